@@ -1,14 +1,21 @@
+import asyncio
 import logging
 import os
 import sqlite3
 import csv
 import random
 import re
-from io import StringIO
-from datetime import datetime
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict, deque
+from io import BytesIO, TextIOWrapper
+from datetime import datetime, time as dt_time
 from dotenv import load_dotenv
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Iterable, Iterator
+from types import MappingProxyType
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import MessageLimit
 from telegram.error import BadRequest
 from telegram.ext import (
     Application,
@@ -19,77 +26,82 @@ from telegram.ext import (
     ContextTypes,
     filters,
 )
-from functools import wraps
-import traceback
+from functools import lru_cache, wraps
 import html
 import json
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
 
 # --- Configuration & Constants ---
 load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 ALLOWED_USER_IDS = [5134940733, 8074969502]  # List of allowed user IDs
 MESSAGE_DELETION_DELAY = 300  # 5 minutes in seconds
+DELETE_SWEEP_INTERVAL = 30  # How often expired bot messages are cleaned up
 ITEMS_PER_PAGE = 5  # For paginated keyboards
+EXPENSE_REPORT_LINES = 10  # Transactions listed in an expense report
 
 # --- Personality ---
-STARTUP_MESSAGES = [
+STARTUP_MESSAGES = (
     "Powered up and ready to judge your spending habits.", "I have been summoned. Let's make some money moves.",
     "The financial overlord is online. Try to impress me.",
-]
-MANUAL_TEXT = (f"<b>🤖 {random.choice(STARTUP_MESSAGES)}</b>\n\n"
-               f"<b>📋 COMMAND CENTER</b>\n"
-               f"<i>Your financial empire awaits...</i>\n\n"
-               
-               f"<b>🎯 Goals & Debts</b>\n"
-               f"<code>new goal</code> - Set a savings target\n"
-               f"<code>new debt</code> - Track debt to pay off\n"
-               f"<code>view all</code> - See all goals/debts\n"
-               f"<code>delete</code> - Remove goals/debts\n\n"
-               
-               f"<b>💳 Payment Tracking</b>\n"
-               f"<code>new payment</code> - Track ongoing payments\n"
-               f"<code>add payment</code> - Log payment made\n"
-               f"<code>view payments</code> - See all payments\n"
-               f"<code>payment progress</code> - Check payment status\n"
-               f"<code>delete payment</code> - Remove payment tracker\n\n"
-               
-               f"<b>💰 Money Moves</b>\n"
-               f"<code>add</code> - Log savings/payments\n"
-               f"<code>progress</code> - Check goal progress\n\n"
-               
-               f"<b>💸 Smart Expense Tracking</b>\n"
-               f"<code>add expense</code> - Record spending\n"
-               f"<code>expense report</code> - View spending analysis\n"
-               f"<code>expense compare</code> - Compare periods\n"
-               f"<code>delete expense</code> - Remove expenses\n"
-               f"<code>set budget</code> - Create spending limits\n"
-               f"<code>budget status</code> - Check budget health\n\n"
-               
-               f"<b>🏦 Asset Management</b>\n"
-               f"<code>add asset</code> - Track investments\n"
-               f"<code>update asset</code> - Modify values\n"
-               f"<code>view assets</code> - Portfolio overview\n"
-               f"<code>delete asset</code> - Remove assets\n"
-               f"<code>view all assets</code> - Detailed breakdown\n\n"
-               
-               f"<b>🔔 Smart Reminders</b>\n"
-               f"<code>add reminder</code> - Custom notifications\n"
-               f"<code>view reminders</code> - See all alarms\n"
-               f"<code>set reminder</code> - Daily savings nudge\n\n"
-               
-               f"<b>📊 Analytics & More</b>\n"
-               f"<code>financial dashboard</code> - Complete overview\n"
-               f"<code>trends</code> - Spending patterns\n"
-               f"<code>export</code> - Download your data\n\n"
-               
-               f"<b>⚠️ Nuclear Options</b>\n"
-               f"<code>erase all</code> - <i>Delete everything</i>\n"
-               f"<code>cancel</code> - Abort current action")
+)
+_MANUAL_BODY = ("<b>📋 COMMAND CENTER</b>\n"
+                "<i>Your financial empire awaits...</i>\n\n"
+                
+                "<b>🎯 Goals & Debts</b>\n"
+                "<code>new goal</code> - Set a savings target\n"
+                "<code>new debt</code> - Track debt to pay off\n"
+                "<code>view all</code> - See all goals/debts\n"
+                "<code>delete</code> - Remove goals/debts\n\n"
+                
+                "<b>💳 Payment Tracking</b>\n"
+                "<code>new payment</code> - Track ongoing payments\n"
+                "<code>add payment</code> - Log payment made\n"
+                "<code>view payments</code> - See all payments\n"
+                "<code>payment progress</code> - Check payment status\n"
+                "<code>delete payment</code> - Remove payment tracker\n\n"
+                
+                "<b>💰 Money Moves</b>\n"
+                "<code>add</code> - Log savings/payments\n"
+                "<code>progress</code> - Check goal progress\n\n"
+                
+                "<b>💸 Smart Expense Tracking</b>\n"
+                "<code>add expense</code> - Record spending\n"
+                "<code>expense report</code> - View spending analysis\n"
+                "<code>expense compare</code> - Compare periods\n"
+                "<code>delete expense</code> - Remove expenses\n"
+                "<code>set budget</code> - Create spending limits\n"
+                "<code>budget status</code> - Check budget health\n\n"
+                
+                "<b>🏦 Asset Management</b>\n"
+                "<code>add asset</code> - Track investments\n"
+                "<code>update asset</code> - Modify values\n"
+                "<code>view assets</code> - Portfolio overview\n"
+                "<code>delete asset</code> - Remove assets\n"
+                "<code>view all assets</code> - Detailed breakdown\n\n"
+                
+                "<b>🔔 Smart Reminders</b>\n"
+                "<code>add reminder</code> - Custom notifications\n"
+                "<code>view reminders</code> - See all alarms\n"
+                "<code>set reminder</code> - Daily savings nudge\n\n"
+                
+                "<b>📊 Analytics & More</b>\n"
+                "<code>financial dashboard</code> - Complete overview\n"
+                "<code>trends</code> - Spending patterns\n"
+                "<code>export</code> - Download your data\n\n"
+                
+                "<b>⚠️ Nuclear Options</b>\n"
+                "<code>erase all</code> - <i>Delete everything</i>\n"
+                "<code>cancel</code> - Abort current action")
+
+# One full manual per greeting, so each /start picks a random one without rebuilding it
+_MANUAL_TEXTS = tuple(f"<b>🤖 {message}</b>\n\n" + _MANUAL_BODY for message in STARTUP_MESSAGES)
+
+def manual_text() -> str:
+    return random.choice(_MANUAL_TEXTS)
+
+# Static parts of the unknown-command reply; only the echoed text and greeting change per message
+_UNKNOWN_PREFIX = "<b>❓ Unknown Command</b>\n\nI don't know what '<code>"
+_UNKNOWN_SUFFIX = "</code>' means. Stick to the script.\n\n"
 
 # --- States for ConversationHandler ---
 (GOAL_NAME, GOAL_AMOUNT, GOAL_CURRENCY,
@@ -115,97 +127,150 @@ logger = logging.getLogger(__name__)
 DATA_DIR = "/data"
 DB_PATH = os.path.join(DATA_DIR, "savings_bot.db")
 
+# A single long-lived connection shared by every handler. The job queue may call
+# in from a worker thread, so first-time setup is guarded by a lock.
+# It runs in autocommit mode: a lone statement commits by itself, and writes that
+# span several statements open their own transaction with `with conn:` and BEGIN.
+_CONN: Optional[sqlite3.Connection] = None
+_CONN_LOCK = threading.Lock()
+
 def db_connect():
-    """Establishes a database connection to the persistent disk."""
-    # Ensure the data directory exists
-    os.makedirs(DATA_DIR, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+    """Returns the shared database connection, opening it on first use."""
+    global _CONN
+    if _CONN is None:
+        with _CONN_LOCK:
+            if _CONN is None:
+                conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None, cached_statements=128)
+                # WAL lets readers run alongside the writer and, with synchronous=NORMAL,
+                # halves the fsyncs per commit on the persistent disk.
+                conn.execute("PRAGMA journal_mode = WAL;")
+                conn.execute("PRAGMA synchronous = NORMAL;")
+                conn.execute("PRAGMA busy_timeout = 5000;")
+                conn.execute("PRAGMA cache_size = -20000;")  # ~20 MB page cache
+                conn.execute("PRAGMA temp_store = MEMORY;")
+                conn.execute("PRAGMA mmap_size = 268435456;")  # Read pages straight from a 256 MB mapping
+                conn.execute("PRAGMA foreign_keys = ON;")
+                # Rows still index and unpack like tuples, and can also be read by column name
+                conn.row_factory = sqlite3.Row
+                _CONN = conn
+    return _CONN
+
+_RCONN: Optional[sqlite3.Connection] = None
+
+def db_connect_readonly():
+    """Returns the shared read-only connection, opening it on first use.
+
+    Under WAL, reads on this connection never wait on the writer. The database
+    must already exist, so this is only opened after init_db().
+    """
+    global _RCONN
+    if _RCONN is None:
+        with _CONN_LOCK:
+            if _RCONN is None:
+                conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False, isolation_level=None, cached_statements=128)
+                conn.execute("PRAGMA query_only = ON;")
+                conn.execute("PRAGMA busy_timeout = 5000;")
+                conn.execute("PRAGMA cache_size = -20000;")
+                conn.execute("PRAGMA mmap_size = 268435456;")
+                conn.row_factory = sqlite3.Row
+                _RCONN = conn
+    return _RCONN
+
+# All tables, created in one script and one transaction on startup
+_SCHEMA_SQL = """
+BEGIN;
+CREATE TABLE IF NOT EXISTS goals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+    name TEXT NOT NULL UNIQUE, target_amount REAL NOT NULL,
+    current_amount REAL DEFAULT 0, currency TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT 'goal', notified_90_percent BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS savings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, goal_id INTEGER NOT NULL,
+    amount REAL NOT NULL, saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (goal_id) REFERENCES goals (id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+    amount REAL NOT NULL, currency TEXT NOT NULL,
+    reason TEXT NOT NULL, category TEXT DEFAULT 'other',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS assets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+    name TEXT NOT NULL, amount REAL NOT NULL, currency TEXT NOT NULL,
+    asset_type TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS budgets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+    category TEXT NOT NULL, amount REAL NOT NULL, currency TEXT NOT NULL,
+    period TEXT NOT NULL DEFAULT 'monthly', current_spent REAL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS recurring_transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+    name TEXT NOT NULL, amount REAL NOT NULL, currency TEXT NOT NULL,
+    type TEXT NOT NULL, category TEXT DEFAULT 'other',
+    frequency TEXT NOT NULL, next_due DATE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+    title TEXT NOT NULL, message TEXT, reminder_time TIME NOT NULL,
+    frequency TEXT NOT NULL DEFAULT 'daily', is_active BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS payments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+    name TEXT NOT NULL UNIQUE, target_amount REAL NOT NULL,
+    current_amount REAL DEFAULT 0, currency TEXT NOT NULL,
+    payment_amount REAL NOT NULL, payment_frequency TEXT NOT NULL DEFAULT 'monthly',
+    recipient TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS payment_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, payment_id INTEGER NOT NULL,
+    amount REAL NOT NULL, paid_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (payment_id) REFERENCES payments (id) ON DELETE CASCADE
+);
+COMMIT;
+"""
+
+# All indexes, created after migrations in one script and one transaction
+_INDEX_SQL = """
+BEGIN;
+-- Indexes for the per-user goal list and the recent-savings lookup (ORDER BY saved_at DESC LIMIT n)
+CREATE INDEX IF NOT EXISTS idx_goals_user ON goals(user_id);
+CREATE INDEX IF NOT EXISTS idx_savings_goal_saved ON savings(goal_id, saved_at DESC);
+-- Per-user lookups on the other tables, matching each getter's WHERE and ORDER BY
+CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses(user_id, created_at DESC);
+-- The dashboard's per-currency spending sums, answered from the index alone
+CREATE INDEX IF NOT EXISTS idx_expenses_user_cur_date ON expenses(user_id, currency, created_at, amount);
+CREATE INDEX IF NOT EXISTS idx_assets_user_type_name ON assets(user_id, asset_type, name);
+CREATE INDEX IF NOT EXISTS idx_payments_user_name ON payments(user_id, name);
+CREATE INDEX IF NOT EXISTS idx_payment_history_pid_date ON payment_history(payment_id, paid_at DESC);
+-- Natural keys for the budget and asset upserts
+CREATE UNIQUE INDEX IF NOT EXISTS idx_budgets_key ON budgets(user_id, category, currency);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_assets_key ON assets(user_id, name, currency);
+COMMIT;
+"""
 
 def init_db():
+    # Ensure the data directory exists before the first connection opens
+    os.makedirs(DATA_DIR, exist_ok=True)
     conn = db_connect()
+    conn.executescript(_SCHEMA_SQL)
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS goals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
-            name TEXT NOT NULL UNIQUE, target_amount REAL NOT NULL,
-            current_amount REAL DEFAULT 0, currency TEXT NOT NULL,
-            type TEXT NOT NULL DEFAULT 'goal', notified_90_percent BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS savings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, goal_id INTEGER NOT NULL,
-            amount REAL NOT NULL, saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (goal_id) REFERENCES goals (id) ON DELETE CASCADE
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS expenses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
-            amount REAL NOT NULL, currency TEXT NOT NULL,
-            reason TEXT NOT NULL, category TEXT DEFAULT 'other',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS assets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
-            name TEXT NOT NULL, amount REAL NOT NULL, currency TEXT NOT NULL,
-            asset_type TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS budgets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
-            category TEXT NOT NULL, amount REAL NOT NULL, currency TEXT NOT NULL,
-            period TEXT NOT NULL DEFAULT 'monthly', current_spent REAL DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS recurring_transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
-            name TEXT NOT NULL, amount REAL NOT NULL, currency TEXT NOT NULL,
-            type TEXT NOT NULL, category TEXT DEFAULT 'other',
-            frequency TEXT NOT NULL, next_due DATE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS reminders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
-            title TEXT NOT NULL, message TEXT, reminder_time TIME NOT NULL,
-            frequency TEXT NOT NULL DEFAULT 'daily', is_active BOOLEAN DEFAULT 1,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS payments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
-            name TEXT NOT NULL UNIQUE, target_amount REAL NOT NULL,
-            current_amount REAL DEFAULT 0, currency TEXT NOT NULL,
-            payment_amount REAL NOT NULL, payment_frequency TEXT NOT NULL DEFAULT 'monthly',
-            recipient TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS payment_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, payment_id INTEGER NOT NULL,
-            amount REAL NOT NULL, paid_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (payment_id) REFERENCES payments (id) ON DELETE CASCADE
-        )
-    """)
-    
+
     # Run database migrations
     migrate_database(cursor)
     
-    conn.commit()
-    conn.close()
+    conn.executescript(_INDEX_SQL)
+    # Refresh planner statistics so the new indexes get picked up
+    cursor.execute("ANALYZE")
+    
     logger.info(f"Database initialized at {DB_PATH}")
 
 def migrate_database(cursor):
@@ -218,68 +283,117 @@ def migrate_database(cursor):
         if 'category' not in columns:
             logger.info("Adding category column to expenses table")
             cursor.execute("ALTER TABLE expenses ADD COLUMN category TEXT DEFAULT 'other'")
+        
+        # Budgets and assets are keyed by unique indexes now, so duplicates collapse into their oldest row.
+        # Spending updates hit every duplicate budget alike, so the extras can go; duplicate assets were
+        # updated one by one, so their amounts are summed into the kept row first
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_budgets_key'")
+        if not cursor.fetchone():
+            with cursor.connection:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("DELETE FROM budgets WHERE id NOT IN (SELECT MIN(id) FROM budgets GROUP BY user_id, category, currency)")
+                budgets_removed = cursor.rowcount
+                cursor.execute("""
+                    UPDATE assets SET
+                        amount = (SELECT SUM(d.amount) FROM assets d
+                                  WHERE d.user_id = assets.user_id AND d.name = assets.name AND d.currency = assets.currency),
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id IN (SELECT MIN(id) FROM assets GROUP BY user_id, name, currency HAVING COUNT(*) > 1)
+                """)
+                assets_merged = cursor.rowcount
+                cursor.execute("DELETE FROM assets WHERE id NOT IN (SELECT MIN(id) FROM assets GROUP BY user_id, name, currency)")
+                assets_removed = cursor.rowcount
+                cursor.execute("DROP INDEX IF EXISTS idx_budgets_user_cat_cur")
+            logger.info(
+                f"Removed {budgets_removed} duplicate budgets; merged {assets_removed} duplicate assets "
+                f"into {assets_merged} before adding unique keys"
+            )
             
     except Exception as e:
         logger.warning(f"Migration warning: {e}")
         # Continue anyway, as some migrations might fail if already applied
 
 # --- UI Formatting & Pagination (No changes from original) ---
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+@lru_cache(maxsize=512)
+def fmt_db_date(date_str: str) -> str:
+    """Formats a stored 'YYYY-MM-DD HH:MM:SS' timestamp as 'Mon DD, YYYY' without parsing it."""
+    return f"{_MONTHS[int(date_str[5:7]) - 1]} {date_str[8:10]}, {date_str[:4]}"
+
+@lru_cache(maxsize=512)
+def fmt_db_day(day_str: str) -> str:
+    """Formats the 'YYYY-MM-DD' prefix of a stored timestamp as 'Mon DD'."""
+    return f"{_MONTHS[int(day_str[5:7]) - 1]} {day_str[8:10]}"
+
+@lru_cache(maxsize=1024)
+def fmt_amount(amount: float) -> str:
+    """Formats a plain amount as '1,234.50'. Targets and regular deposits repeat, so results are cached."""
+    return f"{amount:,.2f}"
+
+_TROPHY_BAR = "[🏆🏆🏆🏆🏆🏆🏆🏆🏆]"
+
+@lru_cache(maxsize=256)
+def _build_progress_bar(filled_length: int, length: int) -> str:
+    return f"[{'🟩' * filled_length}{'⬛️' * (length - filled_length)}]"
+
+# Every bar for the goal lengths, indexed by filled cell count; other lengths go through the LRU cache
+_PROGRESS_BARS = {length: tuple(_build_progress_bar(i, length) for i in range(length + 1)) for length in (10, 15)}
+
 def fmt_progress_bar(percentage: float, length: int = 10) -> str:
-    if percentage >= 100: return "[🏆🏆🏆🏆🏆🏆🏆🏆🏆]"
+    if percentage >= 100: return _TROPHY_BAR
     filled_length = int(length * percentage / 100)
-    bar = '🟩' * filled_length + '⬛️' * (length - filled_length)
-    return f"[{bar}]"
+    bars = _PROGRESS_BARS.get(length)
+    if bars is not None and filled_length >= 0:
+        return bars[filled_length]
+    return _build_progress_bar(filled_length, length)
 
 def fmt_goal_list(goals: List[Tuple]) -> str:
     if not goals: return "Your financial dashboard is a blank canvas. Use `new goal` or `new debt` to start."
-    message = "Alright, here's the current state of your financial empire:\n\n"
+    parts = ["Alright, here's the current state of your financial empire:\n\n"]
     for goal in goals:
-        goal_id, name, target, current, currency, goal_type, _ = goal
-        progress_percent = (current / target) * 100 if target > 0 else 0
+        name, target, current, currency = goal['name'], goal['target_amount'], goal['current_amount'], goal['currency']
+        goal_type, progress_percent, remaining = goal['type'], goal['pct'], goal['remaining']
         progress_bar = fmt_progress_bar(progress_percent)
-        remaining = target - current
         if goal_type == 'goal':
-            message += (f"🎯 **{name.upper()}** (Goal)\n`{progress_bar} {progress_percent:.1f}%`\n"
-                        f"   - **Saved:** `{current:,.2f} / {target:,.2f} {currency}`\n"
-                        f"   - **Needs:** `{remaining:,.2f} {currency}`\n\n")
+            parts.append(f"🎯 **{name.upper()}** (Goal)\n`{progress_bar} {progress_percent:.1f}%`\n"
+                         f"   - **Saved:** `{current:,.2f} / {target:,.2f} {currency}`\n"
+                         f"   - **Needs:** `{remaining:,.2f} {currency}`\n\n")
         elif goal_type == 'debt':
-            message += (f"⛓️ **{name.upper()}** (Debt)\n`{progress_bar} {progress_percent:.1f}% Paid Off`\n"
-                        f"   - **Paid:** `{current:,.2f} / {target:,.2f} {currency}`\n"
-                        f"   - **Remaining Debt:** `{remaining:,.2f} {currency}`\n\n")
-    return message
+            parts.append(f"⛓️ **{name.upper()}** (Debt)\n`{progress_bar} {progress_percent:.1f}% Paid Off`\n"
+                         f"   - **Paid:** `{current:,.2f} / {target:,.2f} {currency}`\n"
+                         f"   - **Remaining Debt:** `{remaining:,.2f} {currency}`\n\n")
+    return "".join(parts)
 
 def fmt_single_goal_progress(goal: Tuple, recent_transactions: List[Tuple]) -> str:
-    goal_id, name, target, current, currency, goal_type, _ = goal
-    progress_percent = (current / target) * 100 if target > 0 else 0
+    name, target, current, currency = goal['name'], goal['target_amount'], goal['current_amount'], goal['currency']
+    goal_type, progress_percent, remaining = goal['type'], goal['pct'], goal['remaining']
     header_emoji = "🎯" if goal_type == 'goal' else "⛓️"
     title = f"{header_emoji} **Progress Report: {name.upper()}**\n"
     animated_bar = fmt_progress_bar(progress_percent, length=15)
     summary = (f"`{animated_bar} {progress_percent:.1f}%`\n\n"
                f"  - **Target:** `{target:,.2f} {currency}`\n"
                f"  - **{'Saved' if goal_type == 'goal' else 'Paid'}:** `{current:,.2f} {currency}`\n"
-               f"  - **Remaining:** `{target - current:,.2f} {currency}`\n")
-    transactions_log = "\n**Recent Activity:**\n"
+               f"  - **Remaining:** `{remaining:,.2f} {currency}`\n")
+    parts = [title, summary, "\n**Recent Activity:**\n"]
     if not recent_transactions:
-        transactions_log += "_No recent transactions found._"
+        parts.append("_No recent transactions found._")
     else:
         for trans in recent_transactions:
             amount, date_str = trans
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-            formatted_date = date_obj.strftime('%b %d, %Y')
-            transactions_log += f"`  - {amount:,.2f} {currency} on {formatted_date}`\n"
-    return title + summary + transactions_log
+            formatted_date = fmt_db_date(date_str)
+            parts.append(f"`  - {amount:,.2f} {currency} on {formatted_date}`\n")
+    return "".join(parts)
 
 def generate_paginated_keyboard(items: List[Tuple], prefix: str, page: int = 0) -> InlineKeyboardMarkup:
     """Creates a paginated inline keyboard."""
-    keyboard = []
     start_index = page * ITEMS_PER_PAGE
     end_index = start_index + ITEMS_PER_PAGE
 
-    for item in items[start_index:end_index]:
-        item_id, name, _, _, currency, goal_type, _ = item
-        emoji = "🎯" if goal_type == 'goal' else "⛓️"
-        button = InlineKeyboardButton(f"{emoji} {name} ({currency})", callback_data=f"{prefix}_{item_id}")
-        keyboard.append([button])
+    keyboard = [
+        [InlineKeyboardButton(f"{'🎯' if goal_type == 'goal' else '⛓️'} {name} ({currency})", callback_data=f"{prefix}_{item_id}")]
+        for item_id, name, _, _, currency, goal_type, *_ in items[start_index:end_index]
+    ]
 
     nav_row = []
     if page > 0:
@@ -293,26 +407,16 @@ def generate_paginated_keyboard(items: List[Tuple], prefix: str, page: int = 0)
     return InlineKeyboardMarkup(keyboard)
 
 def generate_asset_keyboard(assets: List[Tuple], prefix: str, page: int = 0) -> InlineKeyboardMarkup:
-    """Creates a paginated inline keyboard for assets."""
-    keyboard = []
-    start_index = page * ITEMS_PER_PAGE
-    end_index = start_index + ITEMS_PER_PAGE
-
-    for asset in assets[start_index:end_index]:
-        asset_id, name, amount, currency, asset_type, _, _ = asset
-        type_emojis = {
-            'cash': '💵', 'crypto': '₿', 'stocks': '📈', 'bonds': '🏛️',
-            'real_estate': '🏠', 'commodities': '🥇', 'other': '💼'
-        }
-        emoji = type_emojis.get(asset_type.lower(), '💼')
-        formatted_amount = fmt_currency_amount(amount, currency)
-        button = InlineKeyboardButton(f"{emoji} {name} ({formatted_amount})", callback_data=f"{prefix}_{asset_id}")
-        keyboard.append([button])
+    """Creates a paginated inline keyboard for assets from one page of get_user_assets_page."""
+    keyboard = [
+        [InlineKeyboardButton(f"{ASSET_TYPE_EMOJIS.get(asset_type.lower(), '💼')} {name} ({fmt_currency_amount(amount, currency)})", callback_data=f"{prefix}_{asset_id}")]
+        for asset_id, name, amount, currency, asset_type, _, _ in assets[:ITEMS_PER_PAGE]
+    ]
 
     nav_row = []
     if page > 0:
         nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"nav_{prefix}_{page - 1}"))
-    if end_index < len(assets):
+    if len(assets) > ITEMS_PER_PAGE:
         nav_row.append(InlineKeyboardButton("Next ➡️", callback_data=f"nav_{prefix}_{page + 1}"))
 
     if nav_row:
@@ -328,7 +432,7 @@ def generate_expense_keyboard(expenses: List[Tuple], prefix: str, page: int = 0)
 
     for expense in expenses[start_index:end_index]:
         expense_id, amount, currency, reason, category, created_at = expense
-        category_emoji = EXPENSE_CATEGORIES.get(category, '📦 Other').split(' ')[0]
+        category_emoji = _EXPENSE_CATEGORY_EMOJIS.get(category, '📦')
         formatted_amount = fmt_currency_amount(amount, currency)
         
         # Create a short description for the button
@@ -350,106 +454,146 @@ def generate_expense_keyboard(expenses: List[Tuple], prefix: str, page: int = 0)
     return InlineKeyboardMarkup(keyboard)
 
 # --- Database Access Functions (No changes from original) ---
+# Per-user goal lists, so page flips in the selection keyboards don't hit the DB.
+# Every write to the goals table must drop the affected entry and clear get_goal_by_id's cache.
+_GOALS_CACHE: Dict[int, List[Tuple]] = {}
+
+# Goal rows carry their progress percentage and remaining amount, computed by SQLite
+_GOAL_COLUMNS = ("id, name, target_amount, current_amount, currency, type, notified_90_percent, "
+                 "CASE WHEN target_amount > 0 THEN current_amount * 100.0 / target_amount ELSE 0 END AS pct, "
+                 "target_amount - current_amount AS remaining")
+
+# Goal and savings statements, built once so every call hands sqlite3 the same string
+_SQL_SELECT_USER_GOALS = f"SELECT {_GOAL_COLUMNS} FROM goals WHERE user_id = ?"
+_SQL_SELECT_GOAL_BY_ID = f"SELECT {_GOAL_COLUMNS} FROM goals WHERE id = ?"
+_SQL_SELECT_RECENT_TX = "SELECT amount, saved_at FROM savings WHERE goal_id = ? ORDER BY saved_at DESC LIMIT ?"
+_SQL_INSERT_GOAL = "INSERT INTO goals (user_id, name, target_amount, currency, type) VALUES (?, ?, ?, ?, ?)"
+_SQL_DELETE_GOAL = "DELETE FROM goals WHERE id = ? RETURNING name"
+# The INSERT runs before the UPDATE, so its RETURNING subquery sees the old 90% flag
+_SQL_INSERT_SAVING = "INSERT INTO savings (goal_id, amount) VALUES (?, ?) RETURNING (SELECT notified_90_percent FROM goals WHERE id = ?)"
+# Add the amount, raise the 90% flag if this saving lands in the 90-100% band, and read the row back
+_SQL_UPDATE_GOAL_ADD = """
+    UPDATE goals
+    SET current_amount = current_amount + ?,
+        notified_90_percent = CASE
+            WHEN type = 'goal' AND target_amount > 0
+                 AND current_amount + ? >= 0.9 * target_amount
+                 AND current_amount + ? < target_amount
+            THEN 1 ELSE notified_90_percent END
+    WHERE id = ?
+    RETURNING name, target_amount, current_amount, currency, type, notified_90_percent
+"""
+
 def get_user_goals_and_debts(user_id: int) -> List[Tuple]:
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, target_amount, current_amount, currency, type, notified_90_percent FROM goals WHERE user_id = ?", (user_id,))
-    goals = cursor.fetchall()
-    conn.close()
+    return db_connect_readonly().execute(_SQL_SELECT_USER_GOALS, (user_id,)).fetchall()
+
+async def load_user_goals_and_debts(user_id: int) -> List[Tuple]:
+    """A user's goals and debts from the cache, read off the event loop on a miss.
+    Updates are handled one at a time, so no goal write can land between the read and the fill."""
+    goals = _GOALS_CACHE.get(user_id)
+    if goals is None:
+        goals = _GOALS_CACHE[user_id] = await asyncio.to_thread(get_user_goals_and_debts, user_id)
     return goals
 
+@lru_cache(maxsize=64)
 def get_goal_by_id(goal_id: int) -> Optional[Tuple]:
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, target_amount, current_amount, currency, type, notified_90_percent FROM goals WHERE id = ?", (goal_id,))
-    goal = cursor.fetchone()
-    conn.close()
-    return goal
+    return db_connect_readonly().execute(_SQL_SELECT_GOAL_BY_ID, (goal_id,)).fetchone()
 
 def get_recent_transactions(goal_id: int, limit: int = 5) -> List[Tuple]:
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("SELECT amount, saved_at FROM savings WHERE goal_id = ? ORDER BY saved_at DESC LIMIT ?", (goal_id, limit))
-    transactions = cursor.fetchall()
-    conn.close()
-    return transactions
+    return db_connect_readonly().execute(_SQL_SELECT_RECENT_TX, (goal_id, limit)).fetchall()
 
-def delete_goal_from_db(goal_id: int):
+def delete_goal_from_db(goal_id: int) -> Optional[str]:
+    """Deletes a goal and returns its name, or None if it didn't exist."""
     conn = db_connect()
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM goals WHERE id = ?", (goal_id,))
-    conn.commit()
-    conn.close()
+    cursor.execute(_SQL_DELETE_GOAL, (goal_id,))
+    deleted = cursor.fetchone()
+    _GOALS_CACHE.clear()
+    get_goal_by_id.cache_clear()
+    return deleted[0] if deleted else None
 
 def erase_all_data():
     """Erase all data from the database - goals, debts, savings, expenses, assets, budgets, reminders, and payments"""
     conn = db_connect()
-    cursor = conn.cursor()
     try:
-        # Delete all data from all tables (order matters due to foreign keys)
-        cursor.execute("DELETE FROM savings")
-        cursor.execute("DELETE FROM expenses") 
-        cursor.execute("DELETE FROM assets")
-        cursor.execute("DELETE FROM budgets")
-        cursor.execute("DELETE FROM recurring_transactions")
-        cursor.execute("DELETE FROM reminders")
-        cursor.execute("DELETE FROM payment_history")
-        cursor.execute("DELETE FROM payments")
-        cursor.execute("DELETE FROM goals")
-        conn.commit()
+        # Delete all data from all tables in one write transaction (order matters due to foreign keys)
+        conn.executescript("""
+            BEGIN IMMEDIATE;
+            DELETE FROM savings;
+            DELETE FROM expenses;
+            DELETE FROM assets;
+            DELETE FROM budgets;
+            DELETE FROM recurring_transactions;
+            DELETE FROM reminders;
+            DELETE FROM payment_history;
+            DELETE FROM payments;
+            DELETE FROM goals;
+            COMMIT;
+        """)
+        _GOALS_CACHE.clear()
+        get_goal_by_id.cache_clear()
+        get_payment_by_id.cache_clear()
         logger.info("All data erased from database")
         return True
     except Exception as e:
         logger.error(f"Error erasing data: {e}")
-        conn.rollback()
+        # A statement failed mid-script, leaving the transaction open
+        if conn.in_transaction:
+            conn.rollback()
         return False
-    finally:
-        conn.close()
 
 # --- Payment Management Functions ---
+# Payment rows carry their progress percentage, what's left to pay (never negative),
+# and how many whole payments have been made, computed by SQLite
+_PAYMENT_COLUMNS = ("id, name, target_amount, current_amount, currency, payment_amount, payment_frequency, recipient, created_at, "
+                    "CASE WHEN target_amount > 0 THEN current_amount * 100.0 / target_amount ELSE 0 END AS pct, "
+                    "MAX(0, target_amount - current_amount) AS remaining, "
+                    "CASE WHEN payment_amount > 0 THEN CAST(current_amount / payment_amount AS INTEGER) ELSE 0 END AS payments_made")
+
+_SQL_UPDATE_PAYMENT_ADD = f"""
+    UPDATE payments SET current_amount = current_amount + ? WHERE id = ?
+    RETURNING {_PAYMENT_COLUMNS}
+"""
+
 def get_user_payments(user_id: int) -> List[Tuple]:
     """Get all payments for a user"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, name, target_amount, current_amount, currency, payment_amount, 
-               payment_frequency, recipient, created_at
+    return db_connect_readonly().execute(f"""
+        SELECT {_PAYMENT_COLUMNS}
+        FROM payments 
+        WHERE user_id = ?
+        ORDER BY name
+    """, (user_id,)).fetchall()
+
+def get_user_payments_page(user_id: int, page: int, per_page: int = ITEMS_PER_PAGE) -> List[Tuple]:
+    """Get one page of a user's payments, plus the first row of the next page if there is one"""
+    return db_connect_readonly().execute(f"""
+        SELECT {_PAYMENT_COLUMNS}
         FROM payments 
         WHERE user_id = ?
         ORDER BY name
-    """, (user_id,))
-    payments = cursor.fetchall()
-    conn.close()
-    return payments
+        LIMIT ? OFFSET ?
+    """, (user_id, per_page + 1, page * per_page)).fetchall()
 
+# Selecting a payment and then recording it or showing its progress reads the same row twice;
+# every write to payments clears this cache
+@lru_cache(maxsize=64)
 def get_payment_by_id(payment_id: int) -> Optional[Tuple]:
     """Get a specific payment by ID"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, name, target_amount, current_amount, currency, payment_amount, 
-               payment_frequency, recipient, created_at
+    return db_connect_readonly().execute(f"""
+        SELECT {_PAYMENT_COLUMNS}
         FROM payments 
         WHERE id = ?
-    """, (payment_id,))
-    payment = cursor.fetchone()
-    conn.close()
-    return payment
+    """, (payment_id,)).fetchone()
 
 def get_payment_history(payment_id: int, limit: int = 10) -> List[Tuple]:
     """Get recent payment history for a specific payment"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
+    return db_connect_readonly().execute("""
         SELECT amount, paid_at 
         FROM payment_history 
         WHERE payment_id = ? 
         ORDER BY paid_at DESC 
         LIMIT ?
-    """, (payment_id, limit))
-    history = cursor.fetchall()
-    conn.close()
-    return history
+    """, (payment_id, limit)).fetchall()
 
 def delete_payment_from_db(payment_id: int):
     """Delete a payment and its history"""
@@ -457,88 +601,117 @@ def delete_payment_from_db(payment_id: int):
     cursor = conn.cursor()
     try:
         cursor.execute("DELETE FROM payments WHERE id = ?", (payment_id,))
-        conn.commit()
+        get_payment_by_id.cache_clear()
         return True
     except Exception as e:
         logger.error(f"Error deleting payment: {e}")
         return False
-    finally:
-        conn.close()
 
 # --- Expense & Asset Helper Functions ---
+# DATE('now', ...) modifier for each period's start; any other period ('all') has no lower bound.
+# The modifier is a bound parameter, so every period shares one statement, and the bare
+# created_at comparison can walk idx_expenses_user_date.
+_EXPENSE_PERIOD_STARTS = {
+    'today': 'start of day',
+    'week': '-7 days',
+    'month': '-30 days',
+}
+# DATE('now', NULL) is NULL, which COALESCE turns into a bound every timestamp clears
+_SQL_SELECT_EXPENSES_SINCE = """
+    SELECT amount, currency, reason, category, created_at 
+    FROM expenses 
+    WHERE user_id = ? AND created_at >= COALESCE(DATE('now', ?), '')
+    ORDER BY created_at DESC
+"""
+# The report queries read the longer period once and flag the rows that also fall in the shorter one
+_SQL_SELECT_RECENT_EXPENSES_SINCE = """
+    SELECT amount, currency, reason, category, created_at, created_at >= DATE('now', ?) AS in_short
+    FROM expenses 
+    WHERE user_id = ? AND created_at >= DATE('now', ?)
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+# Most recently used groups first, so categories list in the same order as the recent transactions
+_SQL_EXPENSE_CATEGORY_TOTALS_SINCE = """
+    SELECT category, currency, SUM(amount), COUNT(*), created_at >= DATE('now', ?) AS in_short
+    FROM expenses 
+    WHERE user_id = ? AND created_at >= DATE('now', ?)
+    GROUP BY in_short, category, currency
+    ORDER BY MAX(created_at) DESC
+"""
+_SQL_EXPENSE_TOTALS_SINCE = """
+    SELECT currency, SUM(amount)
+    FROM expenses 
+    WHERE user_id = ? AND created_at >= COALESCE(DATE('now', ?), '')
+    GROUP BY currency
+"""
+# Last 7 days and the 7 before them in one grouped scan; is_current splits the two weeks
+_SQL_EXPENSE_WEEK_COMPARISON = """
+    SELECT created_at >= DATE('now', '-7 days') AS is_current, currency, SUM(amount)
+    FROM expenses 
+    WHERE user_id = ? AND created_at >= DATE('now', '-14 days')
+    GROUP BY is_current, currency
+"""
+
 def get_expenses_by_period(user_id: int, period: str) -> List[Tuple]:
     """Get expenses for a specific period (today, week, month, all)"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    
-    if period == 'today':
-        cursor.execute("""
-            SELECT amount, currency, reason, category, created_at 
-            FROM expenses 
-            WHERE user_id = ? AND DATE(created_at) = DATE('now')
-            ORDER BY created_at DESC
-        """, (user_id,))
-    elif period == 'week':
-        cursor.execute("""
-            SELECT amount, currency, reason, category, created_at 
-            FROM expenses 
-            WHERE user_id = ? AND DATE(created_at) >= DATE('now', '-7 days')
-            ORDER BY created_at DESC
-        """, (user_id,))
-    elif period == 'month':
-        cursor.execute("""
-            SELECT amount, currency, reason, category, created_at 
-            FROM expenses 
-            WHERE user_id = ? AND DATE(created_at) >= DATE('now', '-30 days')
-            ORDER BY created_at DESC
-        """, (user_id,))
-    else:  # all
-        cursor.execute("""
-            SELECT amount, currency, reason, category, created_at 
-            FROM expenses 
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-        """, (user_id,))
-    
-    expenses = cursor.fetchall()
-    conn.close()
-    return expenses
+    return db_connect_readonly().execute(_SQL_SELECT_EXPENSES_SINCE, (user_id, _EXPENSE_PERIOD_STARTS.get(period))).fetchall()
 
 def get_expense_totals_by_currency(user_id: int, period: str) -> Dict[str, float]:
     """Get total expenses grouped by currency for a period"""
-    expenses = get_expenses_by_period(user_id, period)
-    totals = {}
-    for amount, currency, _, _, _ in expenses:  # Added category field
-        totals[currency] = totals.get(currency, 0) + amount
-    return totals
+    return dict(db_connect_readonly().execute(_SQL_EXPENSE_TOTALS_SINCE, (user_id, _EXPENSE_PERIOD_STARTS.get(period))).fetchall())
+
+def get_expense_week_comparison(user_id: int) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Get this week's and the previous week's totals by currency"""
+    current_week, previous_week = {}, {}
+    for is_current, currency, total in db_connect_readonly().execute(_SQL_EXPENSE_WEEK_COMPARISON, (user_id,)):
+        (current_week if is_current else previous_week)[currency] = total
+    return current_week, previous_week
+
+def get_expense_reports(user_id: int, short_period: str, long_period: str) -> Tuple[Tuple[List[Tuple], List[Tuple]], Tuple[List[Tuple], List[Tuple]]]:
+    """Get the most recent expenses and totals per category and currency for two nested periods,
+    such as today and this week, from one pass over the longer one"""
+    conn = db_connect_readonly()
+    params = (_EXPENSE_PERIOD_STARTS[short_period], user_id, _EXPENSE_PERIOD_STARTS[long_period])
+    groups = conn.execute(_SQL_EXPENSE_CATEGORY_TOTALS_SINCE, params).fetchall()
+    if not groups:
+        return ([], []), ([], [])  # Nothing spent, so there are no recent rows to look up
+    
+    # Groups arrive newest first, so folding the short period's groups into the long
+    # period's keeps both lists in the same order as the recent transactions
+    short_totals = []
+    long_totals = {}
+    for category, currency, total, count, in_short in groups:
+        if in_short:
+            short_totals.append((category, currency, total, count))
+        if (category, currency) in long_totals:
+            _, _, seen_total, seen_count = long_totals[category, currency]
+            total, count = seen_total + total, seen_count + count
+        long_totals[category, currency] = (category, currency, total, count)
+    
+    # The short period's rows are the newest, so its recent list is a prefix of the long period's
+    recent = conn.execute(_SQL_SELECT_RECENT_EXPENSES_SINCE, (*params, EXPENSE_REPORT_LINES)).fetchall()
+    short_recent = [row[:5] for row in recent if row['in_short']]
+    long_recent = [row[:5] for row in recent]
+    return (short_recent, short_totals), (long_recent, list(long_totals.values()))
 
 def get_user_expenses(user_id: int, limit: int = 50) -> List[Tuple]:
     """Get recent expenses for a user with ID"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
+    return db_connect_readonly().execute("""
         SELECT id, amount, currency, reason, category, created_at 
         FROM expenses 
         WHERE user_id = ?
         ORDER BY created_at DESC
         LIMIT ?
-    """, (user_id, limit))
-    expenses = cursor.fetchall()
-    conn.close()
-    return expenses
+    """, (user_id, limit)).fetchall()
 
 def get_expense_by_id(expense_id: int) -> Optional[Tuple]:
     """Get a specific expense by ID"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
+    return db_connect_readonly().execute("""
         SELECT id, user_id, amount, currency, reason, category, created_at
         FROM expenses 
         WHERE id = ?
-    """, (expense_id,))
-    expense = cursor.fetchone()
-    conn.close()
-    return expense
+    """, (expense_id,)).fetchone()
 
 def delete_expense_from_db(expense_id: int) -> bool:
     """Delete an expense by ID"""
@@ -546,31 +719,34 @@ def delete_expense_from_db(expense_id: int) -> bool:
     cursor = conn.cursor()
     try:
         cursor.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
-        conn.commit()
         return cursor.rowcount > 0
     except Exception as e:
         logger.error(f"Error deleting expense: {e}")
         return False
-    finally:
-        conn.close()
 
 # --- Budget Management Functions ---
+# Insert-or-skip on the (user_id, category, currency) key; rowcount 0 means the budget exists
+_SQL_INSERT_BUDGET = """
+    INSERT INTO budgets (user_id, category, amount, currency, period) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, category, currency) DO NOTHING
+"""
+_SQL_UPDATE_BUDGET = """
+    UPDATE budgets SET amount = ?, period = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = ? AND category = ? AND currency = ?
+"""
+
 def get_user_budgets(user_id: int) -> List[Tuple]:
     """Get all budgets for a user"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
+    return db_connect_readonly().execute("""
         SELECT id, category, amount, currency, period, current_spent, created_at, updated_at
         FROM budgets 
         WHERE user_id = ?
         ORDER BY category
-    """, (user_id,))
-    budgets = cursor.fetchall()
-    conn.close()
-    return budgets
+    """, (user_id,)).fetchall()
 
-def update_budget_spending(user_id: int, category: str, amount: float, currency: str):
-    """Update budget spending when expense is added"""
+def update_budget_and_check(user_id: int, category: str, amount: float, currency: str) -> Optional[str]:
+    """Add an expense to its budget's spending and return an alert message if the limit is near or blown.
+    Joins the caller's transaction if one is open."""
     conn = db_connect()
     cursor = conn.cursor()
     try:
@@ -578,26 +754,13 @@ def update_budget_spending(user_id: int, category: str, amount: float, currency:
             UPDATE budgets 
             SET current_spent = current_spent + ?, updated_at = CURRENT_TIMESTAMP 
             WHERE user_id = ? AND category = ? AND currency = ?
+            RETURNING category, amount, current_spent, currency
         """, (amount, user_id, category, currency))
-        conn.commit()
-        return cursor.rowcount > 0
+        # Drain every returned row; an unfinished statement would block the caller's COMMIT
+        budget = next(iter(cursor.fetchall()), None)
     except Exception as e:
         logger.error(f"Error updating budget spending: {e}")
-        return False
-    finally:
-        conn.close()
-
-def check_budget_alerts(user_id: int, category: str, currency: str) -> Optional[str]:
-    """Check if budget limit is exceeded and return alert message"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT category, amount, current_spent, currency
-        FROM budgets 
-        WHERE user_id = ? AND category = ? AND currency = ?
-    """, (user_id, category, currency))
-    budget = cursor.fetchone()
-    conn.close()
+        return None
     
     if not budget:
         return None
@@ -613,7 +776,7 @@ def check_budget_alerts(user_id: int, category: str, currency: str) -> Optional[
     return None
 
 # --- Enhanced Expense Categories ---
-EXPENSE_CATEGORIES = {
+EXPENSE_CATEGORIES = MappingProxyType({
     'food': '🍽️ Food & Dining',
     'transport': '🚗 Transportation', 
     'shopping': '🛍️ Shopping',
@@ -624,7 +787,24 @@ EXPENSE_CATEGORIES = {
     'travel': '✈️ Travel',
     'gifts': '🎁 Gifts',
     'other': '📦 Other'
-}
+})
+
+# Rendered once from EXPENSE_CATEGORIES: the bare emoji for buttons and report lines,
+# and the category menu shown when logging an expense or setting a budget
+_EXPENSE_CATEGORY_EMOJIS = MappingProxyType({key: value.split(' ')[0] for key, value in EXPENSE_CATEGORIES.items()})
+_EXPENSE_CATEGORY_MENU = "".join(f"<code>{key}</code> - {value}\n" for key, value in EXPENSE_CATEGORIES.items())
+_EXPENSE_CATEGORY_PROMPT = "What category is this expense?\n\n" + _EXPENSE_CATEGORY_MENU
+_BUDGET_CATEGORY_PROMPT = "<b>💰 Set Budget Limit</b>\n\nWhich category?\n\n" + _EXPENSE_CATEGORY_MENU
+
+@lru_cache(maxsize=128)
+def expense_category_name(category: str) -> str:
+    """Display name for a category, falling back to a titled name for ones outside EXPENSE_CATEGORIES."""
+    return EXPENSE_CATEGORIES.get(category) or f'📦 {category.title()}'
+
+ASSET_TYPE_EMOJIS = MappingProxyType({
+    'cash': '💵', 'crypto': '₿', 'stocks': '📈', 'bonds': '🏛️',
+    'real_estate': '🏠', 'commodities': '🥇', 'other': '💼'
+})
 
 # --- Payment Formatting Functions ---
 def fmt_payment_list(payments: List[Tuple]) -> str:
@@ -632,12 +812,12 @@ def fmt_payment_list(payments: List[Tuple]) -> str:
     if not payments:
         return "<b>💳 Payment Tracker</b>\n\n<i>No payments being tracked yet. Use </i><code>new payment</code><i> to start.</i>"
     
-    message = "<b>💳 Payment Tracker</b>\n<i>Ongoing payment obligations</i>\n\n"
+    parts = ["<b>💳 Payment Tracker</b>\n<i>Ongoing payment obligations</i>\n\n"]
     
     for payment in payments:
-        payment_id, name, target, current, currency, payment_amt, frequency, recipient, created = payment
-        progress_percent = (current / target) * 100 if target > 0 else 0
-        remaining = max(0, target - current)  # Don't show negative remaining
+        name, target, current, currency = payment['name'], payment['target_amount'], payment['current_amount'], payment['currency']
+        payment_amt, frequency, recipient = payment['payment_amount'], payment['payment_frequency'], payment['recipient']
+        progress_percent, remaining, payments_made = payment['pct'], payment['remaining'], payment['payments_made']
         
         # Payment status
         if current >= target:
@@ -647,149 +827,135 @@ def fmt_payment_list(payments: List[Tuple]) -> str:
             status = f"{progress_percent:.1f}% Complete"
             progress_bar = fmt_progress_bar(progress_percent, length=8)
         
-        payments_made = int(current / payment_amt) if payment_amt > 0 else 0
-        
-        message += f"💳 <b>{name.upper()}</b>\n"
-        message += f"   To: <i>{recipient}</i>\n"
-        message += f"   <code>{progress_bar} {status}</code>\n"
-        message += f"   • Paid: <code>{fmt_currency_amount(current, currency)}</code> of <code>{fmt_currency_amount(target, currency)}</code>\n"
+        parts.append(f"💳 <b>{name.upper()}</b>\n")
+        parts.append(f"   To: <i>{recipient}</i>\n")
+        parts.append(f"   <code>{progress_bar} {status}</code>\n")
+        parts.append(f"   • Paid: <code>{fmt_currency_amount(current, currency)}</code> of <code>{fmt_currency_amount(target, currency)}</code>\n")
         
         if remaining > 0:
-            message += f"   • Remaining: <code>{fmt_currency_amount(remaining, currency)}</code>\n"
+            parts.append(f"   • Remaining: <code>{fmt_currency_amount(remaining, currency)}</code>\n")
         else:
-            message += f"   • <b>Target exceeded by:</b> <code>{fmt_currency_amount(current - target, currency)}</code>\n"
+            parts.append(f"   • <b>Target exceeded by:</b> <code>{fmt_currency_amount(current - target, currency)}</code>\n")
         
-        message += f"   • Payments: <code>{payments_made}</code> × <code>{fmt_currency_amount(payment_amt, currency)}</code> {frequency}\n\n"
+        parts.append(f"   • Payments: <code>{payments_made}</code> × <code>{fmt_currency_amount(payment_amt, currency)}</code> {frequency}\n\n")
     
-    return message
+    return "".join(parts)
 
 def fmt_payment_progress(payment: Tuple, recent_payments: List[Tuple]) -> str:
     """Format detailed payment progress"""
-    payment_id, name, target, current, currency, payment_amt, frequency, recipient, created = payment
-    progress_percent = (current / target) * 100 if target > 0 else 0
+    name, target, current, currency = payment['name'], payment['target_amount'], payment['current_amount'], payment['currency']
+    payment_amt, frequency, recipient = payment['payment_amount'], payment['payment_frequency'], payment['recipient']
+    progress_percent, remaining, payments_made = payment['pct'], payment['remaining'], payment['payments_made']
     
-    header = f"💳 <b>Payment Progress: {name.upper()}</b>\n"
-    header += f"<i>Paying {recipient}</i>\n\n"
+    parts = [f"💳 <b>Payment Progress: {name.upper()}</b>\n", f"<i>Paying {recipient}</i>\n\n"]
     
     # Progress visualization
     if current >= target:
         animated_bar = fmt_progress_bar(100, length=15)
-        status_line = f"<code>{animated_bar} ✅ TARGET REACHED!</code>\n\n"
+        parts.append(f"<code>{animated_bar} ✅ TARGET REACHED!</code>\n\n")
     else:
         animated_bar = fmt_progress_bar(progress_percent, length=15)
-        status_line = f"<code>{animated_bar} {progress_percent:.1f}%</code>\n\n"
+        parts.append(f"<code>{animated_bar} {progress_percent:.1f}%</code>\n\n")
     
     # Payment details
-    payments_made = int(current / payment_amt) if payment_amt > 0 else 0
-    remaining = max(0, target - current)
-    
-    details = f"<b>📊 Payment Summary:</b>\n"
-    details += f"  • Target Amount: <code>{fmt_currency_amount(target, currency)}</code>\n"
-    details += f"  • Total Paid: <code>{fmt_currency_amount(current, currency)}</code>\n"
+    parts.append(f"<b>📊 Payment Summary:</b>\n")
+    parts.append(f"  • Target Amount: <code>{fmt_currency_amount(target, currency)}</code>\n")
+    parts.append(f"  • Total Paid: <code>{fmt_currency_amount(current, currency)}</code>\n")
     
     if remaining > 0:
-        details += f"  • Remaining: <code>{fmt_currency_amount(remaining, currency)}</code>\n"
+        parts.append(f"  • Remaining: <code>{fmt_currency_amount(remaining, currency)}</code>\n")
         payments_left = remaining / payment_amt if payment_amt > 0 else 0
-        details += f"  • Est. Payments Left: <code>{payments_left:.0f}</code>\n"
+        parts.append(f"  • Est. Payments Left: <code>{payments_left:.0f}</code>\n")
     else:
-        details += f"  • <b>Overpaid by:</b> <code>{fmt_currency_amount(current - target, currency)}</code>\n"
+        parts.append(f"  • <b>Overpaid by:</b> <code>{fmt_currency_amount(current - target, currency)}</code>\n")
     
-    details += f"  • Payment Size: <code>{fmt_currency_amount(payment_amt, currency)}</code> {frequency}\n"
-    details += f"  • Payments Made: <code>{payments_made}</code>\n\n"
+    parts.append(f"  • Payment Size: <code>{fmt_currency_amount(payment_amt, currency)}</code> {frequency}\n")
+    parts.append(f"  • Payments Made: <code>{payments_made}</code>\n\n")
     
     # Recent payments
-    history = "<b>📝 Recent Payments:</b>\n"
+    parts.append("<b>📝 Recent Payments:</b>\n")
     if not recent_payments:
-        history += "<i>No payments recorded yet.</i>"
+        parts.append("<i>No payments recorded yet.</i>")
     else:
         for amount, date_str in recent_payments[:5]:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-            formatted_date = date_obj.strftime('%b %d, %Y')
-            history += f"  • <code>{fmt_currency_amount(amount, currency)}</code> on {formatted_date}\n"
-    
-    return header + status_line + details + history
+            formatted_date = fmt_db_date(date_str)
+            parts.append(f"  • <code>{fmt_currency_amount(amount, currency)}</code> on {formatted_date}\n")
+    
+    return "".join(parts)
+
+# Insert-or-skip on the (user_id, name, currency) key; rowcount 0 means the asset exists
+_SQL_INSERT_ASSET = """
+    INSERT INTO assets (user_id, name, amount, currency, asset_type) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, name, currency) DO NOTHING
+"""
+_SQL_UPDATE_ASSET = """
+    UPDATE assets SET amount = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = ? AND name = ? AND currency = ?
+"""
+
+_SQL_USER_ASSETS = """
+    SELECT id, name, amount, currency, asset_type, created_at, updated_at
+    FROM assets 
+    WHERE user_id = ?
+    ORDER BY asset_type, name
+"""
 
 def get_user_assets(user_id: int) -> List[Tuple]:
     """Get all assets for a user"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
+    return db_connect_readonly().execute(_SQL_USER_ASSETS, (user_id,)).fetchall()
+
+def iter_user_assets(user_id: int) -> Iterator[Tuple]:
+    """Stream a user's assets one row at a time, ordered by type then name"""
+    yield from db_connect_readonly().execute(_SQL_USER_ASSETS, (user_id,))
+
+def get_user_assets_page(user_id: int, page: int, per_page: int = ITEMS_PER_PAGE) -> List[Tuple]:
+    """Get one page of a user's assets, plus the first row of the next page if there is one"""
+    return db_connect_readonly().execute("""
         SELECT id, name, amount, currency, asset_type, created_at, updated_at
         FROM assets 
         WHERE user_id = ?
         ORDER BY asset_type, name
-    """, (user_id,))
-    assets = cursor.fetchall()
-    conn.close()
-    return assets
+        LIMIT ? OFFSET ?
+    """, (user_id, per_page + 1, page * per_page)).fetchall()
 
 def get_asset_by_id(asset_id: int) -> Optional[Tuple]:
     """Get a specific asset by ID"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
+    return db_connect_readonly().execute("""
         SELECT id, name, amount, currency, asset_type, created_at, updated_at
         FROM assets 
         WHERE id = ?
-    """, (asset_id,))
-    asset = cursor.fetchone()
-    conn.close()
-    return asset
-
-def update_asset_amount(asset_id: int, amount_change: float, operation: str) -> bool:
-    """Update asset amount by adding or subtracting"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    
-    try:
-        if operation == 'add':
-            cursor.execute("""
-                UPDATE assets 
-                SET amount = amount + ?, updated_at = CURRENT_TIMESTAMP 
-                WHERE id = ?
-            """, (amount_change, asset_id))
-        elif operation == 'subtract':
-            cursor.execute("""
-                UPDATE assets 
-                SET amount = amount - ?, updated_at = CURRENT_TIMESTAMP 
-                WHERE id = ?
-            """, (amount_change, asset_id))
-        else:
-            return False
-            
-        conn.commit()
-        return True
-    except Exception as e:
-        logger.error(f"Error updating asset: {e}")
-        return False
-    finally:
-        conn.close()
-
-def delete_asset_from_db(asset_id: int) -> bool:
-    """Delete an asset by ID"""
-    conn = db_connect()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("DELETE FROM assets WHERE id = ?", (asset_id,))
-        conn.commit()
-        return cursor.rowcount > 0
-    except Exception as e:
-        logger.error(f"Error deleting asset: {e}")
-        return False
-    finally:
-        conn.close()
+    """, (asset_id,)).fetchone()
 
+def apply_asset_delta(asset_id: int, delta: float) -> Optional[Tuple]:
+    """Add a signed amount to an asset and return its updated row, or None if it doesn't exist"""
+    return db_connect().execute("""
+        UPDATE assets 
+        SET amount = amount + ?, updated_at = CURRENT_TIMESTAMP 
+        WHERE id = ?
+        RETURNING id, name, amount, currency, asset_type, created_at, updated_at
+    """, (delta, asset_id)).fetchone()
+
+def delete_asset_from_db(asset_id: int) -> Optional[Tuple]:
+    """Delete an asset and return the deleted row, or None if it didn't exist"""
+    return db_connect().execute(
+        "DELETE FROM assets WHERE id = ? RETURNING id, name, amount, currency, asset_type", (asset_id,)
+    ).fetchone()
+
+_CURRENCY_SYMBOLS = MappingProxyType({
+    'USD': '$', 'EUR': '€', 'GBP': '£', 'JPY': '¥', 'CNY': '¥',
+    'BTC': '₿', 'ETH': 'Ξ', 'ADA': '₳', 'DOT': '●', 'SOL': '◎',
+    'TONE': '🎵', 'NGN': '₦', 'GHS': '₵'
+})
+_HIGH_PRECISION_CURRENCIES = frozenset({'BTC', 'ETH'})
+
+# Reports show the same totals in several sections, so repeat pairs are served from the cache
+@lru_cache(maxsize=4096)
 def fmt_currency_amount(amount: float, currency: str) -> str:
     """Format currency amounts with proper symbols and formatting"""
-    currency_symbols = {
-        'USD': '$', 'EUR': '€', 'GBP': '£', 'JPY': '¥', 'CNY': '¥',
-        'BTC': '₿', 'ETH': 'Ξ', 'ADA': '₳', 'DOT': '●', 'SOL': '◎',
-        'TONE': '🎵', 'NGN': '₦', 'GHS': '₵'
-    }
-    
-    symbol = currency_symbols.get(currency.upper(), currency.upper())
+    currency_upper = currency.upper()
+    symbol = _CURRENCY_SYMBOLS.get(currency_upper, currency_upper)
     
-    if currency.upper() in ['BTC', 'ETH']:
+    if currency_upper in _HIGH_PRECISION_CURRENCIES:
         return f"{symbol}{amount:.8f}"
     elif amount >= 1000000:
         return f"{symbol}{amount/1000000:.2f}M"
@@ -798,64 +964,55 @@ def fmt_currency_amount(amount: float, currency: str) -> str:
     else:
         return f"{symbol}{amount:,.2f}"
 
-def fmt_expense_report(expenses: List[Tuple], period: str) -> str:
-    """Format expense report with nice formatting"""
-    if not expenses:
+def fmt_expense_report(recent_expenses: List[Tuple], category_totals: List[Tuple], period: str) -> str:
+    """Format expense report with nice formatting, from the rows of get_expense_reports"""
+    if not category_totals:
         return f"<b>📊 Expense Report ({period.title()})</b>\n\n💸 <i>No expenses recorded for this period. Living frugally, I see!</i>"
     
-    # Group by currency and category
-    totals = {}
-    category_totals = {}
-    expense_lines = []
-    
-    for amount, currency, reason, category, created_at in expenses:
-        totals[currency] = totals.get(currency, 0) + amount
-        
-        if category not in category_totals:
-            category_totals[category] = {}
-        category_totals[category][currency] = category_totals[category].get(currency, 0) + amount
-        
-        date_obj = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-        formatted_date = date_obj.strftime('%b %d')
-        category_emoji = EXPENSE_CATEGORIES.get(category, '📦 Other').split(' ')[0]
-        expense_lines.append(f"  • <code>{fmt_currency_amount(amount, currency)}</code> - {reason} {category_emoji} <i>({formatted_date})</i>")
+    # SQLite already summed each category and currency; fold those into the report's totals
+    totals = defaultdict(float)
+    by_category = defaultdict(dict)
+    expense_count = 0
+    for category, currency, total, count in category_totals:
+        totals[currency] += total
+        by_category[category][currency] = total
+        expense_count += count
     
     # Build report with better formatting
-    report = f"<b>📊 Expense Report ({period.title()})</b>\n\n"
+    parts = [f"<b>📊 Expense Report ({period.title()})</b>\n\n"]
     
     # Summary by currency
-    report += "<b>💰 Total Spending:</b>\n"
+    parts.append("<b>💰 Total Spending:</b>\n")
     for currency, total in totals.items():
-        report += f"  <code>{fmt_currency_amount(total, currency)}</code>\n"
+        parts.append(f"  <code>{fmt_currency_amount(total, currency)}</code>\n")
     
     # Summary by category
-    report += f"\n<b>🏷️ By Category:</b>\n"
-    for category, amounts in category_totals.items():
-        category_name = EXPENSE_CATEGORIES.get(category, f'📦 {category.title()}')
-        report += f"  {category_name}: "
+    parts.append(f"\n<b>🏷️ By Category:</b>\n")
+    for category, amounts in by_category.items():
+        category_name = expense_category_name(category)
+        parts.append(f"  {category_name}: ")
         for currency, amount in amounts.items():
-            report += f"<code>{fmt_currency_amount(amount, currency)}</code> "
-        report += "\n"
+            parts.append(f"<code>{fmt_currency_amount(amount, currency)}</code> ")
+        parts.append("\n")
     
-    report += f"\n<b>📝 Recent Transactions ({len(expenses)}):</b>\n"
-    for line in expense_lines[:10]:  # Show max 10 recent transactions
-        report += line + "\n"
+    parts.append(f"\n<b>📝 Recent Transactions ({expense_count}):</b>\n")
+    for amount, currency, reason, category, created_at in recent_expenses:
+        category_emoji = _EXPENSE_CATEGORY_EMOJIS.get(category, '📦')
+        parts.append(f"  • <code>{fmt_currency_amount(amount, currency)}</code> - {reason} {category_emoji} <i>({fmt_db_day(created_at[:10])})</i>\n")
     
-    if len(expenses) > 10:
-        report += f"  <i>... and {len(expenses) - 10} more transactions</i>\n"
+    if expense_count > len(recent_expenses):
+        parts.append(f"  <i>... and {expense_count - len(recent_expenses)} more transactions</i>\n")
     
-    return report
+    return "".join(parts)
 
 def fmt_expense_comparison(current_totals: Dict[str, float], previous_totals: Dict[str, float], period: str) -> str:
     """Format expense comparison between periods"""
     if not current_totals and not previous_totals:
         return f"📈 **Expense Comparison**\n\nNo data for comparison in {period} periods."
     
-    comparison = f"📈 **Expense Comparison ({period.title()})**\n\n"
+    parts = [f"📈 **Expense Comparison ({period.title()})**\n\n"]
     
-    all_currencies = set(current_totals.keys()) | set(previous_totals.keys())
-    
-    for currency in sorted(all_currencies):
+    for currency in sorted(current_totals.keys() | previous_totals.keys()):
         current = current_totals.get(currency, 0)
         previous = previous_totals.get(currency, 0)
         
@@ -873,12 +1030,12 @@ def fmt_expense_comparison(current_totals: Dict[str, float], previous_totals: Di
             else:
                 change_text = f"📉 -{fmt_currency_amount(abs(diff), currency)} ({percentage:+.1f}%)"
         
-        comparison += f"**{currency}:**\n"
-        comparison += f"  Current: {fmt_currency_amount(current, currency)}\n"
-        comparison += f"  Previous: {fmt_currency_amount(previous, currency)}\n"
-        comparison += f"  Change: {change_text}\n\n"
+        parts.append(f"**{currency}:**\n"
+                     f"  Current: {fmt_currency_amount(current, currency)}\n"
+                     f"  Previous: {fmt_currency_amount(previous, currency)}\n"
+                     f"  Change: {change_text}\n\n")
     
-    return comparison
+    return "".join(parts)
 
 def fmt_asset_summary(assets: List[Tuple]) -> str:
     """Format asset summary with nice formatting"""
@@ -886,45 +1043,90 @@ def fmt_asset_summary(assets: List[Tuple]) -> str:
         return "🏦 **Asset Portfolio**\n\n💰 Your vault is empty. Time to start building wealth!"
     
     # Group by asset type and currency
-    by_type = {}
-    totals_by_currency = {}
+    by_type = defaultdict(list)
+    totals_by_currency = defaultdict(float)
     
     for asset_id, name, amount, currency, asset_type, created_at, updated_at in assets:
-        if asset_type not in by_type:
-            by_type[asset_type] = []
         by_type[asset_type].append((name, amount, currency))
-        totals_by_currency[currency] = totals_by_currency.get(currency, 0) + amount
+        totals_by_currency[currency] += amount
     
-    summary = "🏦 **Asset Portfolio**\n\n"
+    parts = ["🏦 **Asset Portfolio**\n\n"]
     
     # Total summary
-    summary += "💎 **Total Value:**\n"
+    parts.append("💎 **Total Value:**\n")
     for currency, total in sorted(totals_by_currency.items()):
-        summary += f"  {fmt_currency_amount(total, currency)}\n"
-    
-    summary += "\n📊 **By Category:**\n"
+        parts.append(f"  {fmt_currency_amount(total, currency)}\n")
     
-    type_emojis = {
-        'cash': '💵', 'crypto': '₿', 'stocks': '📈', 'bonds': '🏛️',
-        'real_estate': '🏠', 'commodities': '🥇', 'other': '💼'
-    }
+    parts.append("\n📊 **By Category:**\n")
     
     for asset_type, type_assets in by_type.items():
-        emoji = type_emojis.get(asset_type.lower(), '💼')
-        summary += f"\n{emoji} **{asset_type.title()}:**\n"
+        emoji = ASSET_TYPE_EMOJIS.get(asset_type.lower(), '💼')
+        parts.append(f"\n{emoji} **{asset_type.title()}:**\n")
         
         for name, amount, currency in type_assets:
-            summary += f"  • {name}: {fmt_currency_amount(amount, currency)}\n"
+            parts.append(f"  • {name}: {fmt_currency_amount(amount, currency)}\n")
     
-    return summary
+    return "".join(parts)
+
+def fmt_asset_portfolio_detailed(assets: Iterable[Tuple]) -> str:
+    """Format the detailed asset portfolio in one pass over rows ordered by asset type.
+    Each type's lines are rendered as its rows arrive; the totals are put in front afterwards."""
+    totals_by_currency = defaultdict(float)
+    type_counts: Dict[str, int] = {}
+    body = []
+    
+    for asset_id, name, amount, currency, asset_type, created_at, updated_at in assets:
+        if asset_type not in type_counts:
+            type_counts[asset_type] = 0
+            emoji = ASSET_TYPE_EMOJIS.get(asset_type.lower(), '💼')
+            body.append(f"\n{emoji} **{asset_type.title()}:**\n")
+        type_counts[asset_type] += 1
+        totals_by_currency[currency] += amount
+        
+        created_date = fmt_db_date(created_at)
+        body.append(f"  • **{name}**: `{fmt_currency_amount(amount, currency)}`\n")
+        if created_at != updated_at:
+            body.append(f"    📅 Created: {created_date} | 🔄 Updated: {fmt_db_date(updated_at)}\n")
+        else:
+            body.append(f"    📅 Created: {created_date}\n")
+    
+    if not type_counts:
+        return "🏦 **Complete Asset Portfolio**\n\n💰 Your vault is completely empty. Time to start building wealth!"
+    
+    parts = ["🏦 **Complete Asset Portfolio**\n\n"]
+    
+    # Total summary
+    parts.append("💎 **Portfolio Value:**\n")
+    for currency, total in sorted(totals_by_currency.items()):
+        parts.append(f"  {fmt_currency_amount(total, currency)}\n")
+    
+    parts.append(f"\n📊 **Assets by Category ({sum(type_counts.values())} total):**\n")
+    parts.extend(body)
+    
+    # Add portfolio insights
+    total_value_usd = totals_by_currency.get('USD', 0)
+    if total_value_usd > 0:
+        parts.append(f"\n💡 **Insights:**\n")
+        parts.append(f"  • USD Portfolio Value: {fmt_currency_amount(total_value_usd, 'USD')}\n")
+        parts.append(f"  • Asset Categories: {len(type_counts)}\n")
+        parts.append(f"  • Most Common Type: {max(type_counts, key=type_counts.get)}\n")
+    
+    return "".join(parts)
 
 # --- PDF Generation ---
-async def delete_message_later(context: ContextTypes.DEFAULT_TYPE):
-    try:
-        await context.bot.delete_message(chat_id=context.job.chat_id, message_id=context.job.data['message_id'])
-    except BadRequest as e:
-        if "message to delete not found" not in e.message:
-            logger.warning(f"Could not delete message {context.job.data['message_id']}: {e}")
+# (expiry, chat_id, message_id) of sent messages awaiting deletion. The delay is
+# constant, so entries are appended in expiry order and expire from the left.
+_PENDING_DELETES: deque = deque()
+
+async def sweep_deletes(context: ContextTypes.DEFAULT_TYPE):
+    now = time.monotonic()
+    while _PENDING_DELETES and _PENDING_DELETES[0][0] <= now:
+        _expiry, chat_id, message_id = _PENDING_DELETES.popleft()
+        try:
+            await context.bot.delete_message(chat_id=chat_id, message_id=message_id)
+        except BadRequest as e:
+            if "message to delete not found" not in e.message:
+                logger.warning(f"Could not delete message {message_id}: {e}")
 
 async def send_and_delete(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, **kwargs):
     try:
@@ -933,7 +1135,30 @@ async def send_and_delete(update: Update, context: ContextTypes.DEFAULT_TYPE, te
     except BadRequest as e:
         logger.warning(f"Could not delete user's message {update.message.message_id if update.message else 'N/A'}: {e}")
     sent_message = await context.bot.send_message(chat_id=update.effective_chat.id, text=text, **kwargs)
-    context.job_queue.run_once(delete_message_later, MESSAGE_DELETION_DELAY, data={'message_id': sent_message.message_id}, chat_id=update.effective_chat.id)
+    _PENDING_DELETES.append((time.monotonic() + MESSAGE_DELETION_DELAY, update.effective_chat.id, sent_message.message_id))
+
+async def edit_or_send_and_delete(update: Update, context: ContextTypes.DEFAULT_TYPE, message_id: Optional[int], text: str, **kwargs):
+    """Like send_and_delete, but rewrites the bot's earlier prompt message in place when there is one."""
+    if message_id is None:
+        return await send_and_delete(update, context, text, **kwargs)
+    chat_id = update.effective_chat.id
+    try:
+        if update.message:
+            await update.message.delete()
+    except BadRequest as e:
+        logger.warning(f"Could not delete user's message: {e}")
+    try:
+        await context.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text, **kwargs)
+    except BadRequest as e:
+        # The prompt is gone or can't be edited any more, so fall back to a fresh message
+        logger.warning(f"Could not edit prompt message {message_id}: {e}")
+        message_id = (await context.bot.send_message(chat_id=chat_id, text=text, **kwargs)).message_id
+    _PENDING_DELETES.append((time.monotonic() + MESSAGE_DELETION_DELAY, chat_id, message_id))
+
+def _parse_amount(text: str) -> Optional[float]:
+    """Parses a user-typed amount, or returns None if it isn't a plain number."""
+    text = text.strip()
+    return float(text) if _AMOUNT_RE.fullmatch(text) else None
 
 def restricted(func):
     @wraps(func)
@@ -944,12 +1169,43 @@ def restricted(func):
         return await func(update, context, *args, **kwargs)
     return wrapped
 
-def generate_pdf_report(records, summary_data, pdf_path):
-    """Generate PDF report from records and summary data"""
+# reportlab is heavy and only needed for exports, so it's imported on first use.
+# The styles are immutable once built, so they're shared across exports.
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+    summary_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.beige]),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    records_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.beige]),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    return getSampleStyleSheet(), summary_style, records_style
+
+def generate_pdf_report(records, summary_data, pdf_file):
+    """Generate PDF report from display-formatted records and summary data into a path or file-like buffer"""
     try:
-        doc = SimpleDocTemplate(pdf_path, pagesize=letter)
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+        styles, summary_style, records_style = _pdf_styles()
+        doc = SimpleDocTemplate(pdf_file, pagesize=letter)
         elements = []
-        styles = getSampleStyleSheet()
         
         # Title
         title = Paragraph("Financial Report", styles['Title'])
@@ -959,40 +1215,18 @@ def generate_pdf_report(records, summary_data, pdf_path):
         # Summary table
         if summary_data:
             summary_table = Table(summary_data)
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 14),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            summary_table.setStyle(summary_style)
             elements.append(summary_table)
             elements.append(Spacer(1, 12))
         
         # Transactions table
         if records:
             # Create table data with headers
-            table_data = [["Name", "Type", "Target", "Currency", "Amount", "Date"]]
-            for record in records:
-                name, type_val, target, currency, amount, date_str = record
-                formatted_date = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d %H:%M')
-                table_data.append([name, type_val, f"{target:,.2f}", currency, f"{amount:,.2f}", formatted_date])
+            table_data = [["Name", "Type", "Target", "Currency", "Amount", "Date"], *records]
             
             # Create and style table
             table = Table(table_data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            table.setStyle(records_style)
             elements.append(table)
         
         # Build PDF
@@ -1131,45 +1365,43 @@ async def handle_final_erase_confirmation(update: Update, context: ContextTypes.
 @restricted
 async def export_data(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await update.message.reply_text("Brewing up your financial reports...")
-    conn = db_connect()
+    conn = db_connect_readonly()
     cursor = conn.cursor()
     cursor.execute("SELECT g.name, g.type, g.target_amount, g.currency, s.amount, s.saved_at FROM goals g JOIN savings s ON g.id = s.goal_id WHERE g.user_id = ? ORDER BY g.name, s.saved_at", (update.effective_user.id,))
-    records = cursor.fetchall()
-    goals_summary = get_user_goals_and_debts(update.effective_user.id)
-    conn.close()
+
+    # Generate CSV in memory, encoding straight into the byte buffer.
+    # Each row is formatted once and the same rows fill the PDF table, which needs them all anyway.
+    csv_buffer = BytesIO()
+    csv_output = TextIOWrapper(csv_buffer, encoding='utf-8', newline='')
+    csv_writer = csv.writer(csv_output)
+    csv_writer.writerow(["Name", "Type", "Target", "Currency", "Amount Paid/Saved", "Date"])
+    records = [[r[0], r[1], fmt_amount(r[2]), r[3], fmt_amount(r[4]), r[5][:16]] for r in cursor.fetchall()]
+    csv_writer.writerows(records)
+    csv_output.flush()
+    csv_output.detach()  # Keep the wrapper from closing csv_buffer
 
     if not records:
         await update.message.reply_text("Nothing to export.")
         return
+    csv_bytes = csv_buffer.getvalue()
 
-    # Generate CSV in memory
-    csv_output = StringIO()
-    csv_writer = csv.writer(csv_output)
-    csv_writer.writerow(["Name", "Type", "Target", "Currency", "Amount Paid/Saved", "Date"])
-    # Convert records to list of lists for csv.writerows
-    csv_records_for_export = [[r[0], r[1], f"{r[2]:,.2f}", r[3], f"{r[4]:,.2f}", datetime.strptime(r[5], '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d %H:%M')] for r in records]
-    csv_writer.writerows(csv_records_for_export)
-    csv_output.seek(0)
-    
-    # Convert StringIO to BytesIO for the document
-    csv_bytes = StringIO(csv_output.getvalue()).read().encode('utf-8')
-    await update.message.reply_document(document=csv_bytes, filename=f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", caption="Here's your data in CSV format.")
+    # Let SQLite count the goals/debts and total their savings/payments per type and currency
+    cursor.execute("SELECT g.type, g.currency, COUNT(DISTINCT g.id), SUM(s.amount) FROM goals g LEFT JOIN savings s ON g.id = s.goal_id WHERE g.user_id = ? GROUP BY g.type, g.currency", (update.effective_user.id,))
+    totals_by_type = cursor.fetchall()
 
-    # Define PDF path within the persistent directory
-    pdf_path = os.path.join(DATA_DIR, f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
-    
     # Calculate summaries
     totals_saved: Dict[str, float] = {}
     totals_paid: Dict[str, float] = {}
-    for record in records:
-        _name, type, _target, currency, amount, _date = record
+    total_goals = total_debts = 0
+    for type, currency, count, total in totals_by_type:
         if type == 'goal':
-            totals_saved[currency] = totals_saved.get(currency, 0) + amount
+            total_goals += count
+            if total is not None:
+                totals_saved[currency] = total
         elif type == 'debt':
-            totals_paid[currency] = totals_paid.get(currency, 0) + amount
-            
-    total_goals = sum(1 for g in goals_summary if g[5] == 'goal')
-    total_debts = sum(1 for g in goals_summary if g[5] == 'debt')
+            total_debts += count
+            if total is not None:
+                totals_paid[currency] = total
     
     summary_data = [["Stat", "Value"], ["Total Savings Goals", str(total_goals)], ["Total Debts", str(total_debts)]]
     if totals_saved:
@@ -1181,26 +1413,30 @@ async def export_data(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         for currency, total in totals_paid.items():
             summary_data.append([f"Total Debt Paid ({currency})", f"{total:,.2f}"])
             
-    # Generate and send PDF
+    # Build the PDF in memory on a worker thread while the CSV uploads, so reportlab doesn't block the event loop
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    pdf_buffer = BytesIO()
+    _, pdf_ok = await asyncio.gather(
+        update.message.reply_document(document=csv_bytes, filename=f"export_{stamp}.csv", caption="Here's your data in CSV format."),
+        asyncio.to_thread(generate_pdf_report, records, summary_data, pdf_buffer),
+    )
+
+    # Send PDF
     try:
-        generate_pdf_report(records, summary_data, pdf_path)
-        with open(pdf_path, 'rb') as pdf_file:
-            await update.message.reply_document(document=pdf_file, filename=os.path.basename(pdf_path), caption="And the fancy PDF version.")
+        if not pdf_ok:
+            raise RuntimeError("PDF generation failed")
+        await update.message.reply_document(document=pdf_buffer.getvalue(), filename=f"report_{stamp}.pdf", caption="And the fancy PDF version.")
     except Exception as e:
         logger.error(f"Failed to generate or send PDF: {e}")
         await update.message.reply_text("I managed the CSV, but the PDF maker threw a tantrum.")
-    finally:
-        # Clean up the generated PDF file from the persistent disk
-        if os.path.exists(pdf_path):
-            os.remove(pdf_path)
 
 @restricted
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    await send_and_delete(update, context, MANUAL_TEXT, parse_mode='HTML')
+    await send_and_delete(update, context, manual_text(), parse_mode='HTML')
 
 @restricted
 async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    await send_and_delete(update, context, f"<b>❓ Unknown Command</b>\n\nI don't know what '<code>{update.message.text}</code>' means. Stick to the script.\n\n" + MANUAL_TEXT, parse_mode='HTML')
+    await send_and_delete(update, context, _UNKNOWN_PREFIX + html.escape(update.message.text) + _UNKNOWN_SUFFIX + manual_text(), parse_mode='HTML')
 
 @restricted
 async def new_goal_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -1211,25 +1447,23 @@ async def get_goal_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     await send_and_delete(update, context, f"'{context.user_data['goal_name']}'. Sounds expensive. How much?")
     return GOAL_AMOUNT
 async def get_goal_amount(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    try:
-        context.user_data['goal_amount'] = float(update.message.text)
-        await send_and_delete(update, context, "Currency? (e.g., USD, TONE)")
-        return GOAL_CURRENCY
-    except ValueError:
+    amount = _parse_amount(update.message.text)
+    if amount is None:
         await send_and_delete(update, context, "That's not a number. Try again.")
         return GOAL_AMOUNT
+    context.user_data['goal_amount'] = amount
+    await send_and_delete(update, context, "Currency? (e.g., USD, TONE)")
+    return GOAL_CURRENCY
 async def get_goal_currency_and_save(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     currency = update.message.text.upper()
     try:
-        conn = db_connect()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO goals (user_id, name, target_amount, currency, type) VALUES (?, ?, ?, ?, ?)", (update.effective_user.id, context.user_data['goal_name'], context.user_data['goal_amount'], currency, 'goal'))
-        conn.commit()
+        db_connect().execute(_SQL_INSERT_GOAL, (update.effective_user.id, context.user_data['goal_name'], context.user_data['goal_amount'], currency, 'goal'))
+        _GOALS_CACHE.pop(update.effective_user.id, None)
+        get_goal_by_id.cache_clear()
         await send_and_delete(update, context, f"✅ Goal set. Don't let '{context.user_data['goal_name']}' become a forgotten dream.")
     except sqlite3.IntegrityError:
         await send_and_delete(update, context, "You already have something with that name. Try a more creative name.")
     finally:
-        if conn: conn.close()
         context.user_data.clear()
         return ConversationHandler.END
 
@@ -1242,31 +1476,29 @@ async def get_debt_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     await send_and_delete(update, context, f"'{context.user_data['debt_name']}'. Oof. Total damage?")
     return DEBT_AMOUNT
 async def get_debt_amount(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    try:
-        context.user_data['debt_amount'] = float(update.message.text)
-        await send_and_delete(update, context, "Currency?")
-        return DEBT_CURRENCY
-    except ValueError:
+    amount = _parse_amount(update.message.text)
+    if amount is None:
         await send_and_delete(update, context, "That's not a number. Try again.")
         return DEBT_AMOUNT
+    context.user_data['debt_amount'] = amount
+    await send_and_delete(update, context, "Currency?")
+    return DEBT_CURRENCY
 async def get_debt_currency_and_save(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     currency = update.message.text.upper()
     try:
-        conn = db_connect()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO goals (user_id, name, target_amount, currency, type) VALUES (?, ?, ?, ?, ?)", (update.effective_user.id, context.user_data['debt_name'], context.user_data['debt_amount'], currency, 'debt'))
-        conn.commit()
+        db_connect().execute(_SQL_INSERT_GOAL, (update.effective_user.id, context.user_data['debt_name'], context.user_data['debt_amount'], currency, 'debt'))
+        _GOALS_CACHE.pop(update.effective_user.id, None)
+        get_goal_by_id.cache_clear()
         await send_and_delete(update, context, f"✅ Debt logged. Let's start chipping away at '{context.user_data['debt_name']}'.")
     except sqlite3.IntegrityError:
         await send_and_delete(update, context, "Already tracking a debt with that name. One crisis at a time.")
     finally:
-        if conn: conn.close()
         context.user_data.clear()
         return ConversationHandler.END
 
 @restricted
 async def view_all(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    goals = get_user_goals_and_debts(update.message.from_user.id)
+    goals = await load_user_goals_and_debts(update.message.from_user.id)
     message = fmt_goal_list(goals)
     await send_and_delete(update, context, message, parse_mode='Markdown')
 
@@ -1282,11 +1514,13 @@ async def paginated_list_start(update: Update, context: ContextTypes.DEFAULT_TYP
     except BadRequest as e:
         logger.warning(f"Could not delete user's message {update.message.message_id if update.message else 'N/A'}: {e}")
 
-    goals = get_user_goals_and_debts(update.effective_user.id)
+    goals = await load_user_goals_and_debts(update.effective_user.id)
     if not goals:
         await context.bot.send_message(chat_id=chat_id, text="You have nothing to select from. Create a goal or debt first.")
         return ConversationHandler.END
     
+    # Remember what the buttons point at, so the selection callback doesn't have to re-read the row
+    context.user_data['goal_choices'] = {g[0]: (g[1], g[4], g[5]) for g in goals}
     reply_markup = generate_paginated_keyboard(goals, prefix=prefix, page=0)
     await context.bot.send_message(chat_id=chat_id, text="Which one are we looking at?", reply_markup=reply_markup)
     return state
@@ -1308,18 +1542,15 @@ async def navigate_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     query = update.callback_query
     await query.answer()  # Acknowledge the callback query
 
-    try:
-        # The data is in the format "nav_{prefix}_{page}".
-        # We remove the "nav_" part and then split from the right to reliably get the page number.
-        data_payload = query.data[4:]  # Removes "nav_"
-        prefix, page_str = data_payload.rsplit('_', 1)
-        page = int(page_str)
-    except (ValueError, IndexError) as e:
-        logger.error(f"Could not parse page number from callback_data: '{query.data}'. Error: {e}")
+    # The data is in the format "nav_{prefix}_{page}"; the prefix itself may contain underscores.
+    match = _NAV_RE.fullmatch(query.data)
+    if not match:
+        logger.error(f"Could not parse page number from callback_data: '{query.data}'.")
         await query.edit_message_text(text="Error processing navigation. Please try again.")
         return  # Return None to stay in the current state
+    prefix, page = match[1], int(match[2])
 
-    goals = get_user_goals_and_debts(query.from_user.id)
+    goals = await load_user_goals_and_debts(query.from_user.id)
     reply_markup = generate_paginated_keyboard(goals, prefix=prefix, page=page)
 
     try:
@@ -1335,23 +1566,33 @@ async def navigate_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 async def select_goal_for_adding(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
-    goal_id = int(query.data.split("_")[-1])
+    goal_id = int(query.data.rpartition("_")[2])
     context.user_data['selected_goal_id'] = goal_id
-    goal = get_goal_by_id(goal_id)
-    if not goal:
-        await query.edit_message_text(text="Error: Goal not found. Please try again.")
-        context.user_data.clear()
-        return ConversationHandler.END
+    choice = context.user_data.get('goal_choices', {}).get(goal_id)
+    if choice is None:
+        goal = await asyncio.to_thread(get_goal_by_id, goal_id)
+        if not goal:
+            await query.edit_message_text(text="Error: Goal not found. Please try again.")
+            context.user_data.clear()
+            return ConversationHandler.END
+        choice = (goal[1], goal[4], goal[5])
 
-    action = "saving for" if goal[5] == 'goal' else "paying off"
-    await query.edit_message_text(text=f"How much are you {action} '{goal[1]}'? ({goal[4]})")
+    name, currency, goal_type = choice
+    action = "saving for" if goal_type == 'goal' else "paying off"
+    await query.edit_message_text(text=f"How much are you {action} '{name}'? ({currency})")
+    context.user_data['prompt_message_id'] = query.message.message_id
     logger.info(f"select_goal_for_adding: User selected goal_id {goal_id} for adding.")
     return ADD_SAVINGS_AMOUNT
 
 async def get_amount_and_save(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     logger.info(f"get_amount_and_save: Received amount text: {update.message.text}")
+    amount = _parse_amount(update.message.text)
+    if amount is None:
+        logger.warning(f"get_amount_and_save: Invalid amount input '{update.message.text}'.")
+        await send_and_delete(update, context, "That's not a valid number. Please enter a numerical amount.")
+        # Do not end conversation here, allow user to retry entering amount
+        return ADD_SAVINGS_AMOUNT # Stay in the same state
     try:
-        amount = float(update.message.text)
         goal_id = context.user_data.get('selected_goal_id')
 
         if goal_id is None:
@@ -1362,38 +1603,36 @@ async def get_amount_and_save(update: Update, context: ContextTypes.DEFAULT_TYPE
 
         conn = db_connect()
         cursor = conn.cursor()
-        cursor.execute("INSERT INTO savings (goal_id, amount) VALUES (?, ?)", (goal_id, amount))
-        cursor.execute("UPDATE goals SET current_amount = current_amount + ? WHERE id = ?", (amount, goal_id))
-        conn.commit()
+        with conn:
+            # Take the write lock up front so the transaction never has to upgrade from a read lock
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(_SQL_INSERT_SAVING, (goal_id, amount, goal_id))
+            was_notified = cursor.fetchone()[0]
+            cursor.execute(_SQL_UPDATE_GOAL_ADD, (amount, amount, amount, goal_id))
+            goal = cursor.fetchone()
+        _GOALS_CACHE.pop(update.effective_user.id, None)
+        get_goal_by_id.cache_clear()
         
-        goal = get_goal_by_id(goal_id)
         if not goal:
             await send_and_delete(update, context, "Successfully recorded, but couldn't retrieve goal details.")
-            conn.close()
             context.user_data.clear()
             return ConversationHandler.END
 
-        name, target, current, currency, type, notified = goal[1], goal[2], goal[3], goal[4], goal[5], goal[6]
-        await send_and_delete(update, context, f"✅ Roger that. {amount:,.2f} {currency} logged for '{name}'.")
+        name, target, current, currency = goal['name'], goal['target_amount'], goal['current_amount'], goal['currency']
+        type, notified = goal['type'], goal['notified_90_percent']
+        await edit_or_send_and_delete(update, context, context.user_data.get('prompt_message_id'), f"✅ Roger that. {amount:,.2f} {currency} logged for '{name}'.")
         
         progress_percent = (current / target) * 100 if target > 0 else 0
         if type == 'goal' and progress_percent >= 100:
             await context.bot.send_message(chat_id=update.effective_chat.id, text=f"🎉 **GOAL REACHED!** 🎉\nYou hit your target for '{name}'.")
-        elif type == 'goal' and progress_percent >= 90 and not notified:
+        elif type == 'goal' and notified and not was_notified:
             await context.bot.send_message(chat_id=update.effective_chat.id, text=f"🔥 **Almost there!** Over 90% of the way to '{name}'.")
-            cursor.execute("UPDATE goals SET notified_90_percent = 1 WHERE id = ?", (goal_id,)); conn.commit()
         elif type == 'debt' and progress_percent >= 100:
              await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ **DEBT CLEARED!** ✅\nYou paid off '{name}'. You are free.")
         
-        conn.close()
         context.user_data.clear()
         logger.info(f"get_amount_and_save: Amount {amount} saved for goal {goal_id}.")
         return ConversationHandler.END
-    except ValueError:
-        logger.warning(f"get_amount_and_save: Invalid amount input '{update.message.text}'.")
-        await send_and_delete(update, context, "That's not a valid number. Please enter a numerical amount.")
-        # Do not end conversation here, allow user to retry entering amount
-        return ADD_SAVINGS_AMOUNT # Stay in the same state
     except KeyError:
         logger.error("get_amount_and_save: 'selected_goal_id' not found in context.user_data. Likely lost conversation state.")
         await send_and_delete(update, context, "It seems I lost track of which goal you were adding to. Please start the `add` command again.")
@@ -1409,11 +1648,10 @@ async def get_amount_and_save(update: Update, context: ContextTypes.DEFAULT_TYPE
 async def confirm_delete(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
-    goal_id = int(query.data.split("_")[-1])
-    goal = get_goal_by_id(goal_id)
-    if goal:
-        delete_goal_from_db(goal_id)
-        await query.edit_message_text(text=f"Gone. '{goal[1]}' has been vanquished.")
+    goal_id = int(query.data.rpartition("_")[2])
+    name = delete_goal_from_db(goal_id)
+    if name is not None:
+        await query.edit_message_text(text=f"Gone. '{name}' has been vanquished.")
     else:
         await query.edit_message_text(text="Goal not found or already deleted.")
     return ConversationHandler.END
@@ -1421,12 +1659,12 @@ async def confirm_delete(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 async def show_goal_progress(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
-    goal_id = int(query.data.split("_")[-1])
-    goal = get_goal_by_id(goal_id)
+    goal_id = int(query.data.rpartition("_")[2])
+    goal = await asyncio.to_thread(get_goal_by_id, goal_id)
     if not goal:
         await query.edit_message_text(text="Error: Goal not found. Please try again.")
         return ConversationHandler.END
-    recent_transactions = get_recent_transactions(goal_id)
+    recent_transactions = await asyncio.to_thread(get_recent_transactions, goal_id)
     progress_message = fmt_single_goal_progress(goal, recent_transactions)
     await query.edit_message_text(text=progress_message, parse_mode='Markdown')
     return ConversationHandler.END
@@ -1438,13 +1676,16 @@ async def set_reminder_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def set_reminder_time(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     try:
-        user_time_str = update.message.text
-        user_time = datetime.strptime(user_time_str, '%H:%M').time()
+        match = _REMINDER_TIME_RE.fullmatch(update.message.text)
+        if not match:
+            raise ValueError("not HH:MM")
+        user_time = dt_time(int(match[1]), int(match[2]))
         chat_id = update.effective_chat.id
-        # Remove any existing jobs for this chat_id before creating a new one
-        for job in context.job_queue.get_jobs_by_name(str(chat_id)):
-            job.schedule_removal()
-        context.job_queue.run_daily(reminder_callback, time=user_time, chat_id=chat_id, name=str(chat_id))
+        # Replace this chat's existing reminder, which is kept in chat_data so there's no job scan
+        old_job = context.chat_data.pop('reminder_job', None)
+        if old_job:
+            old_job.schedule_removal()
+        context.chat_data['reminder_job'] = context.job_queue.run_daily(reminder_callback, time=user_time, chat_id=chat_id, name=str(chat_id))
         await send_and_delete(update, context, f"Done. Expect a poke from me daily at {user_time.strftime('%H:%M')}.")
         return ConversationHandler.END
     except ValueError:
@@ -1456,10 +1697,11 @@ async def reminder_callback(context: ContextTypes.DEFAULT_TYPE) -> None:
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel any ongoing conversation and clean up"""
     try:
-        # Stop any running jobs for this user
+        # Stop this chat's reminder, if one is scheduled
         chat_id = update.effective_chat.id
-        for job in context.job_queue.get_jobs_by_name(str(chat_id)):
-            job.schedule_removal()
+        reminder_job = context.chat_data.pop('reminder_job', None)
+        if reminder_job:
+            reminder_job.schedule_removal()
         
         # Clear any user data
         context.user_data.clear()
@@ -1484,18 +1726,17 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         return ConversationHandler.END
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
+    # exc_info already puts the traceback in the log
     logger.error("Exception while handling an update:", exc_info=context.error)
-    tb_list = traceback.format_exception(None, context.error, context.error.__traceback__)
-    tb_string = "".join(tb_list)
-    update_str = update.to_dict() if isinstance(update, Update) else str(update)
-    message = (f"An exception was raised:\n<pre>update = {html.escape(json.dumps(update_str, indent=2, ensure_ascii=False))}"
-               f"</pre>\n\n<pre>{html.escape(tb_string)}</pre>")
+    # Serializing the whole update is only worth it when debug logs are being read
+    if logger.isEnabledFor(logging.DEBUG):
+        update_str = update.to_dict() if isinstance(update, Update) else str(update)
+        logger.debug(f"Update that raised: {json.dumps(update_str, ensure_ascii=False)}")
     if isinstance(update, Update) and hasattr(update, 'message') and update.message:
         await update.message.reply_text("Looks like I tripped over a bug. Try again, I guess.")
     elif isinstance(update, Update) and hasattr(update, 'callback_query') and update.callback_query:
         await update.callback_query.answer("Looks like I tripped over a bug. Try again, I guess.")
         await update.callback_query.edit_message_text("Looks like I tripped over a bug. Try again, I guess.")
-    logger.error(message)
 
 # --- Expense Tracking Handlers ---
 @restricted
@@ -1504,23 +1745,19 @@ async def add_expense_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     return EXPENSE_AMOUNT
 
 async def get_expense_amount(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    try:
-        context.user_data['expense_amount'] = float(update.message.text)
-        await send_and_delete(update, context, "Currency? (e.g., USD, EUR, BTC)")
-        return EXPENSE_CURRENCY
-    except ValueError:
+    amount = _parse_amount(update.message.text)
+    if amount is None:
         await send_and_delete(update, context, "That's not a number. Try again.")
         return EXPENSE_AMOUNT
+    context.user_data['expense_amount'] = amount
+    await send_and_delete(update, context, "Currency? (e.g., USD, EUR, BTC)")
+    return EXPENSE_CURRENCY
 
 async def get_expense_currency(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data['expense_currency'] = update.message.text.upper()
     
     # Show category options with emojis
-    categories_text = "What category is this expense?\n\n"
-    for key, value in EXPENSE_CATEGORIES.items():
-        categories_text += f"<code>{key}</code> - {value}\n"
-    
-    await send_and_delete(update, context, categories_text, parse_mode='HTML')
+    await send_and_delete(update, context, _EXPENSE_CATEGORY_PROMPT, parse_mode='HTML')
     return EXPENSE_CATEGORY
 
 async def get_expense_category(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -1551,25 +1788,26 @@ async def save_expense(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         
         conn = db_connect()
         cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO expenses (user_id, amount, currency, reason, category) VALUES (?, ?, ?, ?, ?)",
-            (update.effective_user.id, amount, currency, reason, category)
-        )
-        conn.commit()
-        conn.close()
-        
-        # Update budget spending
-        update_budget_spending(update.effective_user.id, category, amount, currency)
-        
-        # Check for budget alerts
-        budget_alert = check_budget_alerts(update.effective_user.id, category, currency)
+        # Record the expense and its budget spending in one transaction
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                "INSERT INTO expenses (user_id, amount, currency, reason, category) VALUES (?, ?, ?, ?, ?)",
+                (update.effective_user.id, amount, currency, reason, category)
+            )
+            budget_alert = update_budget_and_check(update.effective_user.id, category, amount, currency)
         
         formatted_amount = fmt_currency_amount(amount, currency)
-        category_name = EXPENSE_CATEGORIES.get(category, f'📦 {category.title()}')
+        category_name = expense_category_name(category)
         
-        response = f"<b>💸 Expense Recorded!</b>\n\n"
-        response += f"<code>{formatted_amount}</code> - {reason}\n"
-        response += f"Category: {category_name}"
+        response = (
+            f"<b>💸 Expense Recorded!</b>\n\n"
+            f"<code>{formatted_amount}</code> - {reason}\n"
+            f"Category: {category_name}"
+        )
+        # A budget alert rides along in the same message, saving a round trip
+        if budget_alert:
+            response += f"\n\n{budget_alert}"
         
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
@@ -1577,14 +1815,6 @@ async def save_expense(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
             parse_mode='HTML'
         )
         
-        # Send budget alert if needed
-        if budget_alert:
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
-                text=budget_alert,
-                parse_mode='HTML'
-            )
-        
         context.user_data.clear()
         return ConversationHandler.END
         
@@ -1601,41 +1831,27 @@ async def save_expense(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 async def expense_report(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.effective_user.id
     
-    # Get expenses for different periods
-    today_expenses = get_expenses_by_period(user_id, 'today')
-    week_expenses = get_expenses_by_period(user_id, 'week')
-    month_expenses = get_expenses_by_period(user_id, 'month')
+    # Get each period's recent expenses and totals, off the event loop
+    today_data, week_data = await asyncio.to_thread(get_expense_reports, user_id, 'today', 'week')
     
     # Format reports
-    today_report = fmt_expense_report(today_expenses, 'today')
-    week_report = fmt_expense_report(week_expenses, 'week')
+    today_report = fmt_expense_report(*today_data, 'today')
+    week_report = fmt_expense_report(*week_data, 'week')
     
-    # Send reports
-    await send_and_delete(update, context, today_report, parse_mode='HTML')
-    await send_and_delete(update, context, week_report, parse_mode='HTML')
+    # Send both reports in one message when they fit; long reasons can push them past Telegram's limit
+    combined = f"{today_report}\n\n{week_report}"
+    if len(combined) <= MessageLimit.MAX_TEXT_LENGTH:
+        await send_and_delete(update, context, combined, parse_mode='HTML')
+    else:
+        await send_and_delete(update, context, today_report, parse_mode='HTML')
+        await send_and_delete(update, context, week_report, parse_mode='HTML')
 
 @restricted
 async def expense_compare(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.effective_user.id
     
     # Get current and previous week totals
-    current_week = get_expense_totals_by_currency(user_id, 'week')
-    
-    # Get previous week (14-7 days ago)
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT amount, currency
-        FROM expenses 
-        WHERE user_id = ? AND DATE(created_at) >= DATE('now', '-14 days') 
-        AND DATE(created_at) < DATE('now', '-7 days')
-    """, (user_id,))
-    previous_week_data = cursor.fetchall()
-    conn.close()
-    
-    previous_week = {}
-    for amount, currency in previous_week_data:
-        previous_week[currency] = previous_week.get(currency, 0) + amount
+    current_week, previous_week = await asyncio.to_thread(get_expense_week_comparison, user_id)
     
     comparison = fmt_expense_comparison(current_week, previous_week, 'week')
     await send_and_delete(update, context, comparison, parse_mode='HTML')
@@ -1652,7 +1868,7 @@ async def delete_expense_start(update: Update, context: ContextTypes.DEFAULT_TYP
                 logger.warning(f"Could not delete user's message: {e}")
         
         user_id = update.effective_user.id
-        expenses = get_user_expenses(user_id, limit=20)  # Get recent 20 expenses
+        expenses = await asyncio.to_thread(get_user_expenses, user_id, limit=20)  # Get recent 20 expenses
         
         if not expenses:
             await context.bot.send_message(
@@ -1686,8 +1902,8 @@ async def confirm_expense_delete(update: Update, context: ContextTypes.DEFAULT_T
     await query.answer()
     
     try:
-        expense_id = int(query.data.split("_")[-1])
-        expense = get_expense_by_id(expense_id)
+        expense_id = int(query.data.rpartition("_")[2])
+        expense = await asyncio.to_thread(get_expense_by_id, expense_id)
         
         if not expense:
             await query.edit_message_text(
@@ -1706,10 +1922,9 @@ async def confirm_expense_delete(update: Update, context: ContextTypes.DEFAULT_T
         
         # Show confirmation with expense details
         formatted_amount = fmt_currency_amount(amount, currency)
-        category_name = EXPENSE_CATEGORIES.get(category, f'📦 {category.title()}')
+        category_name = expense_category_name(category)
         
-        date_obj = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-        formatted_date = date_obj.strftime('%b %d, %Y at %H:%M')
+        formatted_date = f"{fmt_db_date(created_at)} at {created_at[11:16]}"
         
         confirmation_text = (
             f"<b>🗑️ Confirm Deletion</b>\n\n"
@@ -1757,10 +1972,10 @@ async def handle_expense_delete_confirmation(update: Update, context: ContextTyp
             return ConversationHandler.END
         
         # Extract expense ID from callback data
-        expense_id = int(query.data.split("_")[-1])
+        expense_id = int(query.data.rpartition("_")[2])
         
         # Get expense details before deletion for the success message
-        expense = get_expense_by_id(expense_id)
+        expense = await asyncio.to_thread(get_expense_by_id, expense_id)
         if not expense:
             await query.edit_message_text(
                 text="❌ Expense not found. It may have already been deleted."
@@ -1774,7 +1989,7 @@ async def handle_expense_delete_confirmation(update: Update, context: ContextTyp
         
         if success:
             formatted_amount = fmt_currency_amount(amount, currency)
-            category_name = EXPENSE_CATEGORIES.get(category, f'📦 {category.title()}')
+            category_name = expense_category_name(category)
             
             await query.edit_message_text(
                 text=f"✅ <b>Expense Deleted!</b>\n\n"
@@ -1800,11 +2015,7 @@ async def handle_expense_delete_confirmation(update: Update, context: ContextTyp
 # --- Budget Management Handlers ---
 @restricted
 async def set_budget_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    categories_text = "<b>💰 Set Budget Limit</b>\n\nWhich category?\n\n"
-    for key, value in EXPENSE_CATEGORIES.items():
-        categories_text += f"<code>{key}</code> - {value}\n"
-    
-    await send_and_delete(update, context, categories_text, parse_mode='HTML')
+    await send_and_delete(update, context, _BUDGET_CATEGORY_PROMPT, parse_mode='HTML')
     return BUDGET_CATEGORY
 
 async def get_budget_category(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -1818,13 +2029,13 @@ async def get_budget_category(update: Update, context: ContextTypes.DEFAULT_TYPE
     return BUDGET_AMOUNT
 
 async def get_budget_amount(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    try:
-        context.user_data['budget_amount'] = float(update.message.text)
-        await send_and_delete(update, context, "Currency? (e.g., USD, EUR)")
-        return BUDGET_CURRENCY
-    except ValueError:
+    amount = _parse_amount(update.message.text)
+    if amount is None:
         await send_and_delete(update, context, "That's not a number. Try again.")
         return BUDGET_AMOUNT
+    context.user_data['budget_amount'] = amount
+    await send_and_delete(update, context, "Currency? (e.g., USD, EUR)")
+    return BUDGET_CURRENCY
 
 async def get_budget_currency(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data['budget_currency'] = update.message.text.upper()
@@ -1850,35 +2061,24 @@ async def save_budget(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         conn = db_connect()
         cursor = conn.cursor()
         
-        # Check if budget already exists, update if it does
-        cursor.execute(
-            "SELECT id FROM budgets WHERE user_id = ? AND category = ? AND currency = ?",
-            (update.effective_user.id, category, currency)
-        )
-        existing = cursor.fetchone()
-        
-        if existing:
-            cursor.execute(
-                "UPDATE budgets SET amount = ?, period = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                (amount, period, existing[0])
-            )
-            action = "updated"
-        else:
-            cursor.execute(
-                "INSERT INTO budgets (user_id, category, amount, currency, period) VALUES (?, ?, ?, ?, ?)",
-                (update.effective_user.id, category, amount, currency, period)
-            )
-            action = "created"
-        
-        conn.commit()
-        conn.close()
+        # Insert the budget, or update it if one already exists for this category and currency
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(_SQL_INSERT_BUDGET, (update.effective_user.id, category, amount, currency, period))
+            if cursor.rowcount:
+                action = "created"
+            else:
+                cursor.execute(_SQL_UPDATE_BUDGET, (amount, period, update.effective_user.id, category, currency))
+                action = "updated"
         
         formatted_amount = fmt_currency_amount(amount, currency)
-        category_name = EXPENSE_CATEGORIES.get(category, f'📦 {category.title()}')
+        category_name = expense_category_name(category)
         
-        response = f"<b>💰 Budget {action.title()}!</b>\n\n"
-        response += f"{category_name}: <code>{formatted_amount}</code> per {period[:-2]}\n"
-        response += f"<i>I'll warn you when you hit 80% of this limit.</i>"
+        response = (
+            f"<b>💰 Budget {action.title()}!</b>\n\n"
+            f"{category_name}: <code>{formatted_amount}</code> per {period[:-2]}\n"
+            f"<i>I'll warn you when you hit 80% of this limit.</i>"
+        )
         
         await send_and_delete(update, context, response, parse_mode='HTML')
         
@@ -1890,34 +2090,30 @@ async def save_budget(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         context.user_data.clear()
         return ConversationHandler.END
 
+# Status emoji per spending band: under 50%, 50-80%, 80-100%, and at or over the limit
+_BUDGET_STATUS_THRESHOLDS = (50, 80, 100)
+_BUDGET_STATUS_EMOJIS = ("🟢", "🟡", "⚠️", "🚨")
+
 @restricted
 async def budget_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    budgets = get_user_budgets(update.effective_user.id)
+    budgets = await asyncio.to_thread(get_user_budgets, update.effective_user.id)
     
     if not budgets:
         message = "<b>💰 Budget Status</b>\n\n<i>No budgets set yet. Use </i><code>set budget</code><i> to create spending limits.</i>"
     else:
-        message = "<b>💰 Budget Dashboard</b>\n\n"
+        parts = ["<b>💰 Budget Dashboard</b>\n\n"]
         
         for budget_id, category, limit, currency, period, spent, created_at, updated_at in budgets:
-            category_name = EXPENSE_CATEGORIES.get(category, f'📦 {category.title()}')
+            category_name = expense_category_name(category)
             percentage = (spent / limit) * 100 if limit > 0 else 0
             remaining = limit - spent
+            status = _BUDGET_STATUS_EMOJIS[bisect_right(_BUDGET_STATUS_THRESHOLDS, percentage)]
             
-            # Status emoji based on spending
-            if percentage >= 100:
-                status = "🚨"
-            elif percentage >= 80:
-                status = "⚠️"
-            elif percentage >= 50:
-                status = "🟡"
-            else:
-                status = "🟢"
-            
-            message += f"{status} <b>{category_name}</b>\n"
-            message += f"  Budget: <code>{fmt_currency_amount(limit, currency)}</code> per {period[:-2]}\n"
-            message += f"  Spent: <code>{fmt_currency_amount(spent, currency)}</code> ({percentage:.1f}%)\n"
-            message += f"  Remaining: <code>{fmt_currency_amount(remaining, currency)}</code>\n\n"
+            parts.append(f"{status} <b>{category_name}</b>\n")
+            parts.append(f"  Budget: <code>{fmt_currency_amount(limit, currency)}</code> per {period[:-2]}\n")
+            parts.append(f"  Spent: <code>{fmt_currency_amount(spent, currency)}</code> ({percentage:.1f}%)\n")
+            parts.append(f"  Remaining: <code>{fmt_currency_amount(remaining, currency)}</code>\n\n")
+        message = "".join(parts)
     
     await send_and_delete(update, context, message, parse_mode='HTML')
 
@@ -1938,13 +2134,13 @@ async def get_payment_recipient(update: Update, context: ContextTypes.DEFAULT_TY
     return PAYMENT_TARGET
 
 async def get_payment_target(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    try:
-        context.user_data['payment_target'] = float(update.message.text)
-        await send_and_delete(update, context, "Currency? (e.g., USD, EUR)")
-        return PAYMENT_CURRENCY
-    except ValueError:
+    amount = _parse_amount(update.message.text)
+    if amount is None:
         await send_and_delete(update, context, "That's not a number. Enter the total amount to pay:")
         return PAYMENT_TARGET
+    context.user_data['payment_target'] = amount
+    await send_and_delete(update, context, "Currency? (e.g., USD, EUR)")
+    return PAYMENT_CURRENCY
 
 async def get_payment_currency(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data['payment_currency'] = update.message.text.upper()
@@ -1954,13 +2150,13 @@ async def get_payment_currency(update: Update, context: ContextTypes.DEFAULT_TYP
     return PAYMENT_AMOUNT
 
 async def get_payment_amount(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    try:
-        context.user_data['payment_amount'] = float(update.message.text)
-        await send_and_delete(update, context, "How often do you make this payment?\n\n<code>weekly</code> - Every week\n<code>monthly</code> - Every month\n<code>quarterly</code> - Every 3 months\n<code>yearly</code> - Every year", parse_mode='HTML')
-        return PAYMENT_FREQUENCY
-    except ValueError:
+    amount = _parse_amount(update.message.text)
+    if amount is None:
         await send_and_delete(update, context, "That's not a number. Enter the payment amount:")
         return PAYMENT_AMOUNT
+    context.user_data['payment_amount'] = amount
+    await send_and_delete(update, context, "How often do you make this payment?\n\n<code>weekly</code> - Every week\n<code>monthly</code> - Every month\n<code>quarterly</code> - Every 3 months\n<code>yearly</code> - Every year", parse_mode='HTML')
+    return PAYMENT_FREQUENCY
 
 async def save_payment(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     if update.message:
@@ -1986,15 +2182,15 @@ async def save_payment(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
             INSERT INTO payments (user_id, name, target_amount, currency, payment_amount, payment_frequency, recipient) 
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (update.effective_user.id, name, target, currency, amount, frequency, recipient))
-        conn.commit()
-        conn.close()
         
-        response = f"<b>💳 Payment Tracker Created!</b>\n\n"
-        response += f"<b>Payment:</b> {name}\n"
-        response += f"<b>To:</b> {recipient}\n"
-        response += f"<b>Total:</b> <code>{fmt_currency_amount(target, currency)}</code>\n"
-        response += f"<b>Payment:</b> <code>{fmt_currency_amount(amount, currency)}</code> {frequency}\n\n"
-        response += f"<i>Use </i><code>add payment</code><i> to log payments made!</i>"
+        response = (
+            f"<b>💳 Payment Tracker Created!</b>\n\n"
+            f"<b>Payment:</b> {name}\n"
+            f"<b>To:</b> {recipient}\n"
+            f"<b>Total:</b> <code>{fmt_currency_amount(target, currency)}</code>\n"
+            f"<b>Payment:</b> <code>{fmt_currency_amount(amount, currency)}</code> {frequency}\n\n"
+            f"<i>Use </i><code>add payment</code><i> to log payments made!</i>"
+        )
         
         await send_and_delete(update, context, response, parse_mode='HTML')
         
@@ -2012,7 +2208,7 @@ async def save_payment(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 
 @restricted
 async def view_payments(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    payments = get_user_payments(update.effective_user.id)
+    payments = await asyncio.to_thread(get_user_payments, update.effective_user.id)
     message = fmt_payment_list(payments)
     await send_and_delete(update, context, message, parse_mode='HTML')
 
@@ -2029,7 +2225,7 @@ async def payment_list_start(update: Update, context: ContextTypes.DEFAULT_TYPE,
     except BadRequest as e:
         logger.warning(f"Could not delete user's message: {e}")
 
-    payments = get_user_payments(update.effective_user.id)
+    payments = await asyncio.to_thread(get_user_payments_page, update.effective_user.id, 0)
     if not payments:
         await context.bot.send_message(chat_id=chat_id, text="<b>💳 No Payments Found</b>\n\n<i>Create a payment tracker first with </i><code>new payment</code>", parse_mode='HTML')
         return ConversationHandler.END
@@ -2039,14 +2235,11 @@ async def payment_list_start(update: Update, context: ContextTypes.DEFAULT_TYPE,
     return state
 
 def generate_payment_keyboard(payments: List[Tuple], prefix: str, page: int = 0) -> InlineKeyboardMarkup:
-    """Creates a paginated inline keyboard for payments."""
+    """Creates a paginated inline keyboard for payments from one page of get_user_payments_page."""
     keyboard = []
-    start_index = page * ITEMS_PER_PAGE
-    end_index = start_index + ITEMS_PER_PAGE
 
-    for payment in payments[start_index:end_index]:
-        payment_id, name, target, current, currency, payment_amt, frequency, recipient, created = payment
-        progress = (current / target) * 100 if target > 0 else 0
+    for payment in payments[:ITEMS_PER_PAGE]:
+        payment_id, name, target, current, currency, payment_amt, frequency, recipient, created, progress, *_ = payment
         
         if current >= target:
             emoji = "✅"
@@ -2061,7 +2254,7 @@ def generate_payment_keyboard(payments: List[Tuple], prefix: str, page: int = 0)
     nav_row = []
     if page > 0:
         nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"nav_{prefix}_{page - 1}"))
-    if end_index < len(payments):
+    if len(payments) > ITEMS_PER_PAGE:
         nav_row.append(InlineKeyboardButton("Next ➡️", callback_data=f"nav_{prefix}_{page + 1}"))
 
     if nav_row:
@@ -2069,18 +2262,40 @@ def generate_payment_keyboard(payments: List[Tuple], prefix: str, page: int = 0)
 
     return InlineKeyboardMarkup(keyboard)
 
+async def navigate_payment_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+    await query.answer()
+
+    match = _NAV_RE.fullmatch(query.data)
+    if not match:
+        logger.error(f"Could not parse page number from callback_data: '{query.data}'.")
+        await query.edit_message_text(text="Error processing navigation. Please try again.")
+        return
+    prefix, page = match[1], int(match[2])
+
+    # Only the requested page (plus one row to tell if there's a next page) is read
+    payments = await asyncio.to_thread(get_user_payments_page, query.from_user.id, page)
+    reply_markup = generate_payment_keyboard(payments, prefix=prefix, page=page)
+
+    try:
+        await query.edit_message_reply_markup(reply_markup)
+    except BadRequest as e:
+        if 'Message is not modified' not in str(e):
+             logger.warning(f"Failed to edit message reply markup for navigation: {e}")
+             await query.edit_message_text(text="Could not update the list. Please try again.")
+
 async def select_payment_for_adding(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
-    payment_id = int(query.data.split("_")[-1])
+    payment_id = int(query.data.rpartition("_")[2])
     context.user_data['selected_payment_id'] = payment_id
-    payment = get_payment_by_id(payment_id)
+    payment = await asyncio.to_thread(get_payment_by_id, payment_id)
     if not payment:
         await query.edit_message_text(text="❌ Error: Payment not found.", parse_mode='HTML')
         context.user_data.clear()
         return ConversationHandler.END
 
-    _, name, target, current, currency, payment_amt, frequency, recipient, _ = payment
+    _, name, target, current, currency, payment_amt, frequency, recipient, *_ = payment
     
     await query.edit_message_text(
         text=f"<b>💳 Recording Payment</b>\n\n"
@@ -2090,11 +2305,15 @@ async def select_payment_for_adding(update: Update, context: ContextTypes.DEFAUL
              f"How much did you pay?",
         parse_mode='HTML'
     )
+    context.user_data['prompt_message_id'] = query.message.message_id
     return ADD_PAYMENT_AMOUNT
 
 async def get_payment_amount_and_save(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    amount = _parse_amount(update.message.text)
+    if amount is None:
+        await send_and_delete(update, context, "❌ That's not a valid number. Enter the payment amount:", parse_mode='HTML')
+        return ADD_PAYMENT_AMOUNT
     try:
-        amount = float(update.message.text)
         payment_id = context.user_data.get('selected_payment_id')
 
         if payment_id is None:
@@ -2105,35 +2324,33 @@ async def get_payment_amount_and_save(update: Update, context: ContextTypes.DEFA
         conn = db_connect()
         cursor = conn.cursor()
         
-        # Add to payment history
-        cursor.execute("INSERT INTO payment_history (payment_id, amount) VALUES (?, ?)", (payment_id, amount))
-        
-        # Update current amount in payments table
-        cursor.execute("UPDATE payments SET current_amount = current_amount + ? WHERE id = ?", (amount, payment_id))
-        
-        conn.commit()
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            # Add to payment history
+            cursor.execute("INSERT INTO payment_history (payment_id, amount) VALUES (?, ?)", (payment_id, amount))
+            
+            # Update current amount in payments table and read back what the reply needs
+            cursor.execute(_SQL_UPDATE_PAYMENT_ADD, (amount, payment_id))
+            payment = cursor.fetchone()
+        get_payment_by_id.cache_clear()
         
-        payment = get_payment_by_id(payment_id)
         if payment:
-            _, name, target, current, currency, payment_amt, frequency, recipient, _ = payment
-            progress = (current / target) * 100 if target > 0 else 0
-            
-            response = f"<b>✅ Payment Recorded!</b>\n\n"
-            response += f"<code>{fmt_currency_amount(amount, currency)}</code> paid to {recipient}\n\n"
-            response += f"<b>Progress:</b> <code>{fmt_currency_amount(current, currency)}</code> / <code>{fmt_currency_amount(target, currency)}</code> ({progress:.1f}%)\n"
+            target, current, currency = payment['target_amount'], payment['current_amount'], payment['currency']
+            recipient, progress = payment['recipient'], payment['pct']
             
+            response = (
+                f"<b>✅ Payment Recorded!</b>\n\n"
+                f"<code>{fmt_currency_amount(amount, currency)}</code> paid to {recipient}\n\n"
+                f"<b>Progress:</b> <code>{fmt_currency_amount(current, currency)}</code> / <code>{fmt_currency_amount(target, currency)}</code> ({progress:.1f}%)\n"
+            )
             if current >= target:
                 response += f"\n🎉 <b>TARGET REACHED!</b> Payment continues tracking."
             
-            await send_and_delete(update, context, response, parse_mode='HTML')
+            await edit_or_send_and_delete(update, context, context.user_data.get('prompt_message_id'), response, parse_mode='HTML')
         
-        conn.close()
         context.user_data.clear()
         return ConversationHandler.END
         
-    except ValueError:
-        await send_and_delete(update, context, "❌ That's not a valid number. Enter the payment amount:", parse_mode='HTML')
-        return ADD_PAYMENT_AMOUNT
     except Exception as e:
         logger.error(f"Error saving payment: {e}")
         await send_and_delete(update, context, "❌ Error recording payment. Try again.", parse_mode='HTML')
@@ -2147,13 +2364,13 @@ async def payment_progress_start(update: Update, context: ContextTypes.DEFAULT_T
 async def show_payment_progress(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
-    payment_id = int(query.data.split("_")[-1])
-    payment = get_payment_by_id(payment_id)
+    payment_id = int(query.data.rpartition("_")[2])
+    payment = await asyncio.to_thread(get_payment_by_id, payment_id)
     if not payment:
         await query.edit_message_text(text="❌ Error: Payment not found.")
         return ConversationHandler.END
     
-    recent_payments = get_payment_history(payment_id)
+    recent_payments = await asyncio.to_thread(get_payment_history, payment_id)
     progress_message = fmt_payment_progress(payment, recent_payments)
     await query.edit_message_text(text=progress_message, parse_mode='HTML')
     return ConversationHandler.END
@@ -2165,8 +2382,8 @@ async def delete_payment_start(update: Update, context: ContextTypes.DEFAULT_TYP
 async def confirm_payment_delete(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
-    payment_id = int(query.data.split("_")[-1])
-    payment = get_payment_by_id(payment_id)
+    payment_id = int(query.data.rpartition("_")[2])
+    payment = await asyncio.to_thread(get_payment_by_id, payment_id)
     if payment:
         success = delete_payment_from_db(payment_id)
         if success:
@@ -2178,90 +2395,92 @@ async def confirm_payment_delete(update: Update, context: ContextTypes.DEFAULT_T
     return ConversationHandler.END
 
 # --- Financial Dashboard ---
+# Every dashboard figure outside the goals, reduced by SQLite in one statement.
+# Money totals only count USD, for simplicity.
+_SQL_DASHBOARD_STATS = """
+    SELECT
+        (SELECT COUNT(*) FROM assets WHERE user_id = ?1) AS asset_count,
+        (SELECT TOTAL(amount) FROM assets WHERE user_id = ?1 AND currency = 'USD') AS assets_usd,
+        (SELECT TOTAL(amount) FROM expenses
+         WHERE user_id = ?1 AND currency = 'USD' AND created_at >= DATE('now', 'start of day')) AS today_usd,
+        (SELECT TOTAL(amount) FROM expenses
+         WHERE user_id = ?1 AND currency = 'USD' AND created_at >= DATE('now', '-7 days')) AS week_usd,
+        (SELECT COUNT(*) FROM budgets WHERE user_id = ?1) AS budget_count,
+        (SELECT COUNT(*) FROM budgets
+         WHERE user_id = ?1 AND amount > 0 AND current_spent / amount * 100 >= 80) AS budget_alerts
+"""
+
+def get_dashboard_stats(user_id: int) -> sqlite3.Row:
+    """Get the asset, spending and budget figures for the financial dashboard"""
+    return db_connect_readonly().execute(_SQL_DASHBOARD_STATS, (user_id,)).fetchone()
+
+_DASHBOARD_HEADER = "<b>📊 FINANCIAL DASHBOARD</b>\n<i>Your complete financial overview</i>\n\n"
+_DASHBOARD_QUICK_ACTIONS = (
+    "\n<b>⚡ Quick Actions</b>\n"
+    "<code>add expense</code> - Record spending\n"
+    "<code>add</code> - Save towards goal\n"
+    "<code>budget status</code> - Check limits\n"
+    "<code>view all</code> - See all goals\n"
+)
+
 @restricted
 async def financial_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.effective_user.id
     
-    # Get all data
-    goals = get_user_goals_and_debts(user_id)
-    assets = get_user_assets(user_id)
-    budgets = get_user_budgets(user_id)
-    today_expenses = get_expenses_by_period(user_id, 'today')
-    week_expenses = get_expenses_by_period(user_id, 'week')
+    # Get all data; the uncached stats query runs off the event loop
+    goals = await load_user_goals_and_debts(user_id)
+    stats = await asyncio.to_thread(get_dashboard_stats, user_id)
     
-    # Calculate totals
-    goal_progress = 0
-    debt_progress = 0
-    total_assets_usd = 0
-    today_spending = 0
-    week_spending = 0
+    # Sum and count goal and debt progress in one pass
+    goal_progress = debt_progress = 0
+    goal_count = debt_count = 0
     
     for goal in goals:
-        if goal[5] == 'goal':
-            goal_progress += (goal[3] / goal[2]) * 100 if goal[2] > 0 else 0
+        if goal['type'] == 'goal':
+            goal_progress += goal['pct']
+            goal_count += 1
         else:
-            debt_progress += (goal[3] / goal[2]) * 100 if goal[2] > 0 else 0
-    
-    for asset in assets:
-        if asset[3] == 'USD':  # Only count USD assets for simplicity
-            total_assets_usd += asset[2]
-    
-    for expense in today_expenses:
-        if expense[1] == 'USD':
-            today_spending += expense[0]
-    
-    for expense in week_expenses:
-        if expense[1] == 'USD':
-            week_spending += expense[0]
+            debt_progress += goal['pct']
+            debt_count += 1
     
     # Build dashboard
-    dashboard = f"<b>📊 FINANCIAL DASHBOARD</b>\n"
-    dashboard += f"<i>Your complete financial overview</i>\n\n"
+    parts = [_DASHBOARD_HEADER]
     
     # Quick stats
-    dashboard += f"<b>🎯 Goals & Debts ({len(goals)})</b>\n"
+    parts.append(f"<b>🎯 Goals & Debts ({len(goals)})</b>\n")
     if goals:
-        avg_goal_progress = goal_progress / len([g for g in goals if g[5] == 'goal']) if any(g[5] == 'goal' for g in goals) else 0
-        avg_debt_progress = debt_progress / len([g for g in goals if g[5] == 'debt']) if any(g[5] == 'debt' for g in goals) else 0
-        dashboard += f"  Avg Goal Progress: <code>{avg_goal_progress:.1f}%</code>\n"
-        if any(g[5] == 'debt' for g in goals):
-            dashboard += f"  Avg Debt Paid: <code>{avg_debt_progress:.1f}%</code>\n"
+        avg_goal_progress = goal_progress / goal_count if goal_count else 0
+        avg_debt_progress = debt_progress / debt_count if debt_count else 0
+        parts.append(f"  Avg Goal Progress: <code>{avg_goal_progress:.1f}%</code>\n")
+        if debt_count:
+            parts.append(f"  Avg Debt Paid: <code>{avg_debt_progress:.1f}%</code>\n")
     else:
-        dashboard += f"  <i>No goals set yet</i>\n"
+        parts.append("  <i>No goals set yet</i>\n")
     
-    dashboard += f"\n<b>🏦 Assets ({len(assets)})</b>\n"
-    if assets:
-        dashboard += f"  Portfolio Value: <code>${total_assets_usd:,.2f}</code>\n"
+    parts.append(f"\n<b>🏦 Assets ({stats['asset_count']})</b>\n")
+    if stats['asset_count']:
+        parts.append(f"  Portfolio Value: <code>${stats['assets_usd']:,.2f}</code>\n")
     else:
-        dashboard += f"  <i>No assets tracked</i>\n"
+        parts.append("  <i>No assets tracked</i>\n")
     
-    dashboard += f"\n<b>💸 Spending</b>\n"
-    dashboard += f"  Today: <code>${today_spending:,.2f}</code>\n"
-    dashboard += f"  This Week: <code>${week_spending:,.2f}</code>\n"
+    parts.append(
+        f"\n<b>💸 Spending</b>\n"
+        f"  Today: <code>${stats['today_usd']:,.2f}</code>\n"
+        f"  This Week: <code>${stats['week_usd']:,.2f}</code>\n"
+    )
     
     # Budget alerts
-    budget_alerts = 0
-    for budget in budgets:
-        percentage = (budget[5] / budget[2]) * 100 if budget[2] > 0 else 0
-        if percentage >= 80:
-            budget_alerts += 1
-    
-    dashboard += f"\n<b>💰 Budgets ({len(budgets)})</b>\n"
-    if budget_alerts > 0:
-        dashboard += f"  ⚠️ <code>{budget_alerts}</code> budget(s) need attention\n"
-    elif budgets:
-        dashboard += f"  ✅ All budgets healthy\n"
+    parts.append(f"\n<b>💰 Budgets ({stats['budget_count']})</b>\n")
+    if stats['budget_alerts'] > 0:
+        parts.append(f"  ⚠️ <code>{stats['budget_alerts']}</code> budget(s) need attention\n")
+    elif stats['budget_count']:
+        parts.append("  ✅ All budgets healthy\n")
     else:
-        dashboard += f"  <i>No budgets set</i>\n"
+        parts.append("  <i>No budgets set</i>\n")
     
-    # Quick actions
-    dashboard += f"\n<b>⚡ Quick Actions</b>\n"
-    dashboard += f"<code>add expense</code> - Record spending\n"
-    dashboard += f"<code>add</code> - Save towards goal\n"
-    dashboard += f"<code>budget status</code> - Check limits\n"
-    dashboard += f"<code>view all</code> - See all goals\n"
+    parts.append(_DASHBOARD_QUICK_ACTIONS)
     
-    await send_and_delete(update, context, dashboard, parse_mode='HTML')
+    await send_and_delete(update, context, "".join(parts), parse_mode='HTML')
 
 # --- Asset Tracking Handlers ---
 @restricted
@@ -2275,13 +2494,13 @@ async def get_asset_name(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     return ASSET_AMOUNT
 
 async def get_asset_amount(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    try:
-        context.user_data['asset_amount'] = float(update.message.text)
-        await send_and_delete(update, context, "Currency? (e.g., USD, BTC, ETH)")
-        return ASSET_CURRENCY
-    except ValueError:
+    amount = _parse_amount(update.message.text)
+    if amount is None:
         await send_and_delete(update, context, "That's not a number. Try again.")
         return ASSET_AMOUNT
+    context.user_data['asset_amount'] = amount
+    await send_and_delete(update, context, "Currency? (e.g., USD, BTC, ETH)")
+    return ASSET_CURRENCY
 
 async def get_asset_currency(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data['asset_currency'] = update.message.text.upper()
@@ -2305,28 +2524,15 @@ async def save_asset(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         conn = db_connect()
         cursor = conn.cursor()
         
-        # Check if asset already exists, update if it does
-        cursor.execute(
-            "SELECT id FROM assets WHERE user_id = ? AND name = ? AND currency = ?",
-            (update.effective_user.id, name, currency)
-        )
-        existing = cursor.fetchone()
-        
-        if existing:
-            cursor.execute(
-                "UPDATE assets SET amount = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                (amount, existing[0])
-            )
-            action = "updated"
-        else:
-            cursor.execute(
-                "INSERT INTO assets (user_id, name, amount, currency, asset_type) VALUES (?, ?, ?, ?, ?)",
-                (update.effective_user.id, name, amount, currency, asset_type)
-            )
-            action = "added"
-        
-        conn.commit()
-        conn.close()
+        # Insert the asset, or update it if one already exists with this name and currency
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(_SQL_INSERT_ASSET, (update.effective_user.id, name, amount, currency, asset_type))
+            if cursor.rowcount:
+                action = "added"
+            else:
+                cursor.execute(_SQL_UPDATE_ASSET, (amount, update.effective_user.id, name, currency))
+                action = "updated"
         
         formatted_amount = fmt_currency_amount(amount, currency)
         await send_and_delete(update, context, f"🏦 Asset {action}: {name} - {formatted_amount}")
@@ -2341,13 +2547,13 @@ async def save_asset(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
 @restricted
 async def view_assets(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    assets = get_user_assets(update.effective_user.id)
+    assets = await asyncio.to_thread(get_user_assets, update.effective_user.id)
     summary = fmt_asset_summary(assets)
     await send_and_delete(update, context, summary, parse_mode='Markdown')
 
 @restricted
 async def asset_summary(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    assets = get_user_assets(update.effective_user.id)
+    assets = await asyncio.to_thread(get_user_assets, update.effective_user.id)
     summary = fmt_asset_summary(assets)
     await send_and_delete(update, context, summary, parse_mode='Markdown')
 
@@ -2359,11 +2565,13 @@ async def update_asset_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     except BadRequest as e:
         logger.warning(f"Could not delete user's message: {e}")
 
-    assets = get_user_assets(update.effective_user.id)
+    assets = await asyncio.to_thread(get_user_assets_page, update.effective_user.id, 0)
     if not assets:
         await context.bot.send_message(chat_id=update.effective_chat.id, text="🏦 No assets found. Use `add asset` to create one first.")
         return ConversationHandler.END
     
+    # Remember what the buttons point at, so the selection callback doesn't have to re-read the row
+    context.user_data['asset_choices'] = {a[0]: a[1:5] for a in assets}
     reply_markup = generate_asset_keyboard(assets, prefix="update_asset", page=0)
     await context.bot.send_message(chat_id=update.effective_chat.id, text="💼 Which asset do you want to update?", reply_markup=reply_markup)
     return UPDATE_ASSET_SELECT
@@ -2372,16 +2580,15 @@ async def navigate_asset_menu(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
 
-    try:
-        data_payload = query.data[4:]  # Removes "nav_"
-        prefix, page_str = data_payload.rsplit('_', 1)
-        page = int(page_str)
-    except (ValueError, IndexError) as e:
-        logger.error(f"Could not parse page number from callback_data: '{query.data}'. Error: {e}")
+    match = _NAV_RE.fullmatch(query.data)
+    if not match:
+        logger.error(f"Could not parse page number from callback_data: '{query.data}'.")
         await query.edit_message_text(text="Error processing navigation. Please try again.")
         return
+    prefix, page = match[1], int(match[2])
 
-    assets = get_user_assets(query.from_user.id)
+    assets = await asyncio.to_thread(get_user_assets_page, query.from_user.id, page)
+    context.user_data.setdefault('asset_choices', {}).update((a[0], a[1:5]) for a in assets)
     reply_markup = generate_asset_keyboard(assets, prefix=prefix, page=page)
 
     try:
@@ -2395,16 +2602,19 @@ async def select_asset_for_update(update: Update, context: ContextTypes.DEFAULT_
     query = update.callback_query
     await query.answer()
     
-    asset_id = int(query.data.split("_")[-1])
+    asset_id = int(query.data.rpartition("_")[2])
     context.user_data['selected_asset_id'] = asset_id
     
-    asset = get_asset_by_id(asset_id)
-    if not asset:
-        await query.edit_message_text(text="❌ Error: Asset not found. Please try again.")
-        context.user_data.clear()
-        return ConversationHandler.END
+    choice = context.user_data.get('asset_choices', {}).get(asset_id)
+    if choice is None:
+        asset = await asyncio.to_thread(get_asset_by_id, asset_id)
+        if not asset:
+            await query.edit_message_text(text="❌ Error: Asset not found. Please try again.")
+            context.user_data.clear()
+            return ConversationHandler.END
+        choice = asset[1:5]
 
-    asset_id, name, amount, currency, asset_type, _, _ = asset
+    name, amount, currency, asset_type = choice
     formatted_amount = fmt_currency_amount(amount, currency)
     
     await query.edit_message_text(
@@ -2432,72 +2642,46 @@ async def process_asset_update(update: Update, context: ContextTypes.DEFAULT_TYP
             context.user_data.clear()
             return ConversationHandler.END
 
-        # Parse the amount and operation
-        if amount_text.startswith('+'):
-            operation = 'add'
-            amount = float(amount_text[1:])
-        elif amount_text.startswith('-'):
-            operation = 'subtract'
-            amount = float(amount_text[1:])
-        else:
-            # If no sign, assume it's an addition
-            operation = 'add'
-            amount = float(amount_text)
+        # The signed amount is the change itself; no sign means an addition
+        delta = _parse_amount(amount_text)
+        if delta is None:
+            await send_and_delete(update, context, "❌ Invalid amount format. Use +100, -50, or just 100")
+            return UPDATE_ASSET_AMOUNT
 
-        if amount <= 0:
+        if delta == 0:
             await send_and_delete(update, context, "❌ Amount must be greater than 0. Try again.")
             return UPDATE_ASSET_AMOUNT
 
-        # Get asset details before update
-        asset = get_asset_by_id(asset_id)
+        # Update the asset and read back its new state in one statement
+        asset = apply_asset_delta(asset_id, delta)
         if not asset:
             await send_and_delete(update, context, "❌ Asset not found. Please try again.")
             context.user_data.clear()
             return ConversationHandler.END
 
-        old_amount = asset[2]
-        name = asset[1]
-        currency = asset[3]
-        asset_type = asset[4]
-
-        # Update the asset
-        success = update_asset_amount(asset_id, amount, operation)
+        _, name, new_amount, currency, asset_type, *_ = asset
+        old_amount = new_amount - delta
         
-        if success:
-            # Get updated asset details
-            updated_asset = get_asset_by_id(asset_id)
-            new_amount = updated_asset[2]
-            
-            # Format the response
-            old_formatted = fmt_currency_amount(old_amount, currency)
-            new_formatted = fmt_currency_amount(new_amount, currency)
-            change_formatted = fmt_currency_amount(amount, currency)
-            
-            operation_symbol = "+" if operation == 'add' else "-"
-            operation_text = "Added" if operation == 'add' else "Subtracted"
-            
-            type_emojis = {
-                'cash': '💵', 'crypto': '₿', 'stocks': '📈', 'bonds': '🏛️',
-                'real_estate': '🏠', 'commodities': '🥇', 'other': '💼'
-            }
-            emoji = type_emojis.get(asset_type.lower(), '💼')
-            
-            response = (f"✅ **Asset Updated Successfully!**\n\n"
-                       f"{emoji} **{name}** ({asset_type.title()})\n"
-                       f"Previous: `{old_formatted}`\n"
-                       f"Change: `{operation_symbol}{change_formatted}`\n"
-                       f"**New Total: `{new_formatted}`**")
-            
-            await send_and_delete(update, context, response, parse_mode='Markdown')
-        else:
-            await send_and_delete(update, context, "❌ Failed to update asset. Please try again.")
+        # Format the response
+        old_formatted = fmt_currency_amount(old_amount, currency)
+        new_formatted = fmt_currency_amount(new_amount, currency)
+        change_formatted = fmt_currency_amount(abs(delta), currency)
+        
+        operation_symbol = "+" if delta > 0 else "-"
+        
+        emoji = ASSET_TYPE_EMOJIS.get(asset_type.lower(), '💼')
+        
+        response = (f"✅ **Asset Updated Successfully!**\n\n"
+                   f"{emoji} **{name}** ({asset_type.title()})\n"
+                   f"Previous: `{old_formatted}`\n"
+                   f"Change: `{operation_symbol}{change_formatted}`\n"
+                   f"**New Total: `{new_formatted}`**")
+        
+        await send_and_delete(update, context, response, parse_mode='Markdown')
 
         context.user_data.clear()
         return ConversationHandler.END
 
-    except ValueError:
-        await send_and_delete(update, context, "❌ Invalid amount format. Use +100, -50, or just 100")
-        return UPDATE_ASSET_AMOUNT
     except Exception as e:
         logger.error(f"Error in process_asset_update: {e}")
         await send_and_delete(update, context, "❌ An error occurred. Please try again.")
@@ -2512,7 +2696,7 @@ async def delete_asset_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     except BadRequest as e:
         logger.warning(f"Could not delete user's message: {e}")
 
-    assets = get_user_assets(update.effective_user.id)
+    assets = await asyncio.to_thread(get_user_assets_page, update.effective_user.id, 0)
     if not assets:
         await context.bot.send_message(chat_id=update.effective_chat.id, text="🏦 No assets found to delete. Use `add asset` to create one first.")
         return ConversationHandler.END
@@ -2525,16 +2709,14 @@ async def navigate_delete_asset_menu(update: Update, context: ContextTypes.DEFAU
     query = update.callback_query
     await query.answer()
 
-    try:
-        data_payload = query.data[4:]  # Removes "nav_"
-        prefix, page_str = data_payload.rsplit('_', 1)
-        page = int(page_str)
-    except (ValueError, IndexError) as e:
-        logger.error(f"Could not parse page number from callback_data: '{query.data}'. Error: {e}")
+    match = _NAV_RE.fullmatch(query.data)
+    if not match:
+        logger.error(f"Could not parse page number from callback_data: '{query.data}'.")
         await query.edit_message_text(text="Error processing navigation. Please try again.")
         return
+    prefix, page = match[1], int(match[2])
 
-    assets = get_user_assets(query.from_user.id)
+    assets = await asyncio.to_thread(get_user_assets_page, query.from_user.id, page)
     reply_markup = generate_asset_keyboard(assets, prefix=prefix, page=page)
 
     try:
@@ -2548,133 +2730,131 @@ async def confirm_asset_delete(update: Update, context: ContextTypes.DEFAULT_TYP
     query = update.callback_query
     await query.answer()
     
-    asset_id = int(query.data.split("_")[-1])
-    asset = get_asset_by_id(asset_id)
+    asset_id = int(query.data.rpartition("_")[2])
+    
+    # Delete the asset; the deleted row comes back for the confirmation
+    try:
+        asset = delete_asset_from_db(asset_id)
+    except Exception as e:
+        logger.error(f"Error deleting asset: {e}")
+        await query.edit_message_text(text="❌ Failed to delete asset. Please try again.")
+        return ConversationHandler.END
     
     if not asset:
         await query.edit_message_text(text="❌ Error: Asset not found.")
         return ConversationHandler.END
 
-    asset_id, name, amount, currency, asset_type, _, _ = asset
+    asset_id, name, amount, currency, asset_type = asset
     formatted_amount = fmt_currency_amount(amount, currency)
     
-    type_emojis = {
-        'cash': '💵', 'crypto': '₿', 'stocks': '📈', 'bonds': '🏛️',
-        'real_estate': '🏠', 'commodities': '🥇', 'other': '💼'
-    }
-    emoji = type_emojis.get(asset_type.lower(), '💼')
+    emoji = ASSET_TYPE_EMOJIS.get(asset_type.lower(), '💼')
     
-    # Delete the asset
-    success = delete_asset_from_db(asset_id)
-    
-    if success:
-        await query.edit_message_text(
-            text=f"🗑️ **Asset Deleted Successfully!**\n\n"
-                 f"{emoji} **{name}** ({asset_type.title()})\n"
-                 f"Value: `{formatted_amount}`\n\n"
-                 f"💀 Gone forever. Hope you don't regret this."
-        )
-    else:
-        await query.edit_message_text(text="❌ Failed to delete asset. Please try again.")
+    await query.edit_message_text(
+        text=f"🗑️ **Asset Deleted Successfully!**\n\n"
+             f"{emoji} **{name}** ({asset_type.title()})\n"
+             f"Value: `{formatted_amount}`\n\n"
+             f"💀 Gone forever. Hope you don't regret this."
+    )
     
     return ConversationHandler.END
 
 @restricted
 async def view_all_assets_detailed(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show a detailed view of all assets with creation/update dates"""
-    assets = get_user_assets(update.effective_user.id)
-    
-    if not assets:
-        message = "🏦 **Complete Asset Portfolio**\n\n💰 Your vault is completely empty. Time to start building wealth!"
-    else:
-        # Group by asset type and currency for totals
-        by_type = {}
-        totals_by_currency = {}
-        
-        for asset_id, name, amount, currency, asset_type, created_at, updated_at in assets:
-            if asset_type not in by_type:
-                by_type[asset_type] = []
-            by_type[asset_type].append((name, amount, currency, created_at, updated_at))
-            totals_by_currency[currency] = totals_by_currency.get(currency, 0) + amount
-        
-        message = "🏦 **Complete Asset Portfolio**\n\n"
-        
-        # Total summary
-        message += "💎 **Portfolio Value:**\n"
-        for currency, total in sorted(totals_by_currency.items()):
-            message += f"  {fmt_currency_amount(total, currency)}\n"
-        
-        message += f"\n📊 **Assets by Category ({len(assets)} total):**\n"
-        
-        type_emojis = {
-            'cash': '💵', 'crypto': '₿', 'stocks': '📈', 'bonds': '🏛️',
-            'real_estate': '🏠', 'commodities': '🥇', 'other': '💼'
-        }
-        
-        for asset_type, type_assets in by_type.items():
-            emoji = type_emojis.get(asset_type.lower(), '💼')
-            message += f"\n{emoji} **{asset_type.title()}:**\n"
-            
-            for name, amount, currency, created_at, updated_at in type_assets:
-                formatted_amount = fmt_currency_amount(amount, currency)
-                
-                # Parse dates
-                created_date = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S').strftime('%b %d, %Y')
-                updated_date = datetime.strptime(updated_at, '%Y-%m-%d %H:%M:%S').strftime('%b %d, %Y')
-                
-                message += f"  • **{name}**: `{formatted_amount}`\n"
-                if created_at != updated_at:
-                    message += f"    📅 Created: {created_date} | 🔄 Updated: {updated_date}\n"
-                else:
-                    message += f"    📅 Created: {created_date}\n"
-        
-        # Add portfolio insights
-        total_value_usd = sum(total for currency, total in totals_by_currency.items() if currency == 'USD')
-        if total_value_usd > 0:
-            message += f"\n💡 **Insights:**\n"
-            message += f"  • USD Portfolio Value: {fmt_currency_amount(total_value_usd, 'USD')}\n"
-            message += f"  • Asset Categories: {len(by_type)}\n"
-            message += f"  • Most Common Type: {max(by_type.keys(), key=lambda k: len(by_type[k]))}\n"
+    # The generator runs its query in the worker thread, where the rows are formatted as they stream in
+    message = await asyncio.to_thread(fmt_asset_portfolio_detailed, iter_user_assets(update.effective_user.id))
     
     await send_and_delete(update, context, message, parse_mode='Markdown')
 
+# --- Command Patterns ---
+# Compiled once at import; every keyword is matched case-insensitively against the whole message
+_COMMAND_RE = {name: re.compile(rf'^{name}$', re.IGNORECASE) for name in (
+    'new goal',
+    'new debt',
+    'delete',
+    'progress',
+    'set reminder',
+    'add expense',
+    'delete expense',
+    'set budget',
+    'add asset',
+    'update asset',
+    'delete asset',
+    'new payment',
+    'add payment',
+    'payment progress',
+    'delete payment',
+    'erase all',
+    'view all',
+    'export',
+    'expense report',
+    'expense compare',
+    'view assets',
+    'asset summary',
+    'view all assets',
+    'budget status',
+    'financial dashboard',
+    'view payments',
+)}
+_COMMAND_RE['add'] = re.compile(r'^\s*add\s*$', re.IGNORECASE)
+_CANCEL_RE = re.compile(r'^cancel$', re.IGNORECASE)
+# Pagination callbacks: "nav_{prefix}_{page}"
+_NAV_RE = re.compile(r'nav_(.+)_(\d+)')
+# A plain decimal amount with an optional sign; no exponents, inf or nan
+_AMOUNT_RE = re.compile(r'[+-]?(?:\d+(?:\.\d*)?|\.\d+)')
+# Same hours and minutes datetime.strptime(..., '%H:%M') accepts, without its per-call format lookup
+_REMINDER_TIME_RE = re.compile(r'(2[0-3]|[01]\d|\d):([0-5]\d|\d)')
+
+# Every keyword above, for the unknown-command catch-all's single set lookup
+_KNOWN_COMMANDS = frozenset(_COMMAND_RE)
+
+class _UnknownCommandFilter(filters.MessageFilter):
+    """Passes text messages that aren't one of the known keyword commands."""
+    def filter(self, message) -> bool:
+        return message.text.strip().lower() not in _KNOWN_COMMANDS
+
 def main() -> None:
     init_db()
     application = Application.builder().token(TELEGRAM_BOT_TOKEN).connect_timeout(30).read_timeout(30).build()
     application.add_error_handler(error_handler)
+    application.job_queue.run_repeating(sweep_deletes, interval=DELETE_SWEEP_INTERVAL)
     
     # Regex patterns are case-insensitive
+    # Handlers hold no per-conversation state, so every conversation shares this one
+    cancel_handler = MessageHandler(filters.Regex(_CANCEL_RE), cancel)
+    # Free-text replies inside conversations; built once and shared by every state
+    text_filter = filters.TEXT & ~filters.COMMAND
     conv_handler_new_goal = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^new goal$', re.IGNORECASE)), new_goal_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['new goal']), new_goal_start)],
         states={
-            GOAL_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_goal_name)],
-            GOAL_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_goal_amount)],
-            GOAL_CURRENCY: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_goal_currency_and_save)],
+            GOAL_NAME: [MessageHandler(text_filter, get_goal_name)],
+            GOAL_AMOUNT: [MessageHandler(text_filter, get_goal_amount)],
+            GOAL_CURRENCY: [MessageHandler(text_filter, get_goal_currency_and_save)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_new_debt = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^new debt$', re.IGNORECASE)), new_debt_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['new debt']), new_debt_start)],
         states={
-            DEBT_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_debt_name)],
-            DEBT_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_debt_amount)],
-            DEBT_CURRENCY: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_debt_currency_and_save)],
+            DEBT_NAME: [MessageHandler(text_filter, get_debt_name)],
+            DEBT_AMOUNT: [MessageHandler(text_filter, get_debt_amount)],
+            DEBT_CURRENCY: [MessageHandler(text_filter, get_debt_currency_and_save)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_add = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^\s*add\s*$', re.IGNORECASE)), add_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['add']), add_start)],
         states={
             ADD_SAVINGS_GOAL: [
                 CallbackQueryHandler(navigate_menu, pattern="^nav_add_to_"),
                 CallbackQueryHandler(select_goal_for_adding, pattern="^add_to_"),
             ],
-            ADD_SAVINGS_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_amount_and_save)],
+            ADD_SAVINGS_AMOUNT: [MessageHandler(text_filter, get_amount_and_save)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_delete = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^delete$', re.IGNORECASE)), delete_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['delete']), delete_start)],
         states={
             DELETE_GOAL_CONFIRM: [
                 CallbackQueryHandler(navigate_menu, pattern="^nav_delete_"),
@@ -2684,7 +2864,7 @@ def main() -> None:
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_progress = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^progress$', re.IGNORECASE)), progress_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['progress']), progress_start)],
         states={
             PROGRESS_GOAL_SELECT: [
                 CallbackQueryHandler(navigate_menu, pattern="^nav_progress_"),
@@ -2694,28 +2874,28 @@ def main() -> None:
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_reminder = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^set reminder$', re.IGNORECASE)), set_reminder_start)],
-        states={REMINDER_TIME: [MessageHandler(filters.TEXT & ~filters.COMMAND, set_reminder_time)]},
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['set reminder']), set_reminder_start)],
+        states={REMINDER_TIME: [MessageHandler(text_filter, set_reminder_time)]},
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_add_expense = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^add expense$', re.IGNORECASE)), add_expense_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['add expense']), add_expense_start)],
         states={
             EXPENSE_AMOUNT: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_expense_amount)
+                cancel_handler,
+                MessageHandler(text_filter, get_expense_amount)
             ],
             EXPENSE_CURRENCY: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_expense_currency)
+                cancel_handler,
+                MessageHandler(text_filter, get_expense_currency)
             ],
             EXPENSE_CATEGORY: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_expense_category)
+                cancel_handler,
+                MessageHandler(text_filter, get_expense_category)
             ],
             EXPENSE_REASON: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, save_expense)
+                cancel_handler,
+                MessageHandler(text_filter, save_expense)
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
@@ -2723,7 +2903,7 @@ def main() -> None:
     
     # Delete Expense Conversation Handler
     conv_handler_delete_expense = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^delete expense$', re.IGNORECASE)), delete_expense_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['delete expense']), delete_expense_start)],
         states={
             DELETE_EXPENSE_SELECT: [
                 CallbackQueryHandler(confirm_expense_delete, pattern="^delete_expense_"),
@@ -2735,50 +2915,50 @@ def main() -> None:
     )
     
     conv_handler_set_budget = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^set budget$', re.IGNORECASE)), set_budget_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['set budget']), set_budget_start)],
         states={
             BUDGET_CATEGORY: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_budget_category)
+                cancel_handler,
+                MessageHandler(text_filter, get_budget_category)
             ],
             BUDGET_AMOUNT: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_budget_amount)
+                cancel_handler,
+                MessageHandler(text_filter, get_budget_amount)
             ],
             BUDGET_CURRENCY: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_budget_currency)
+                cancel_handler,
+                MessageHandler(text_filter, get_budget_currency)
             ],
             BUDGET_PERIOD: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, save_budget)
+                cancel_handler,
+                MessageHandler(text_filter, save_budget)
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_add_asset = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^add asset$', re.IGNORECASE)), add_asset_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['add asset']), add_asset_start)],
         states={
-            ASSET_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_asset_name)],
-            ASSET_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_asset_amount)],
-            ASSET_CURRENCY: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_asset_currency)],
-            ASSET_TYPE: [MessageHandler(filters.TEXT & ~filters.COMMAND, save_asset)],
+            ASSET_NAME: [MessageHandler(text_filter, get_asset_name)],
+            ASSET_AMOUNT: [MessageHandler(text_filter, get_asset_amount)],
+            ASSET_CURRENCY: [MessageHandler(text_filter, get_asset_currency)],
+            ASSET_TYPE: [MessageHandler(text_filter, save_asset)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_update_asset = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^update asset$', re.IGNORECASE)), update_asset_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['update asset']), update_asset_start)],
         states={
             UPDATE_ASSET_SELECT: [
                 CallbackQueryHandler(navigate_asset_menu, pattern="^nav_update_asset_"),
                 CallbackQueryHandler(select_asset_for_update, pattern="^update_asset_"),
             ],
-            UPDATE_ASSET_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, process_asset_update)],
+            UPDATE_ASSET_AMOUNT: [MessageHandler(text_filter, process_asset_update)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_delete_asset = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^delete asset$', re.IGNORECASE)), delete_asset_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['delete asset']), delete_asset_start)],
         states={
             DELETE_ASSET_SELECT: [
                 CallbackQueryHandler(navigate_delete_asset_menu, pattern="^nav_delete_asset_"),
@@ -2788,61 +2968,64 @@ def main() -> None:
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_new_payment = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^new payment$', re.IGNORECASE)), new_payment_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['new payment']), new_payment_start)],
         states={
             PAYMENT_NAME: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_payment_name)
+                cancel_handler,
+                MessageHandler(text_filter, get_payment_name)
             ],
             PAYMENT_RECIPIENT: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_payment_recipient)
+                cancel_handler,
+                MessageHandler(text_filter, get_payment_recipient)
             ],
             PAYMENT_TARGET: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_payment_target)
+                cancel_handler,
+                MessageHandler(text_filter, get_payment_target)
             ],
             PAYMENT_CURRENCY: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_payment_currency)
+                cancel_handler,
+                MessageHandler(text_filter, get_payment_currency)
             ],
             PAYMENT_AMOUNT: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_payment_amount)
+                cancel_handler,
+                MessageHandler(text_filter, get_payment_amount)
             ],
             PAYMENT_FREQUENCY: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, save_payment)
+                cancel_handler,
+                MessageHandler(text_filter, save_payment)
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_add_payment = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^add payment$', re.IGNORECASE)), add_payment_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['add payment']), add_payment_start)],
         states={
             ADD_PAYMENT_SELECT: [
+                CallbackQueryHandler(navigate_payment_menu, pattern="^nav_add_payment_"),
                 CallbackQueryHandler(select_payment_for_adding, pattern="^add_payment_"),
             ],
             ADD_PAYMENT_AMOUNT: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, get_payment_amount_and_save)
+                cancel_handler,
+                MessageHandler(text_filter, get_payment_amount_and_save)
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_payment_progress = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^payment progress$', re.IGNORECASE)), payment_progress_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['payment progress']), payment_progress_start)],
         states={
             PAYMENT_PROGRESS_SELECT: [
+                CallbackQueryHandler(navigate_payment_menu, pattern="^nav_payment_progress_"),
                 CallbackQueryHandler(show_payment_progress, pattern="^payment_progress_"),
             ]
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     conv_handler_delete_payment = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^delete payment$', re.IGNORECASE)), delete_payment_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['delete payment']), delete_payment_start)],
         states={
             DELETE_PAYMENT_SELECT: [
+                CallbackQueryHandler(navigate_payment_menu, pattern="^nav_delete_payment_"),
                 CallbackQueryHandler(confirm_payment_delete, pattern="^delete_payment_"),
             ],
         },
@@ -2851,11 +3034,11 @@ def main() -> None:
     
     # Erase All Conversation Handler
     conv_handler_erase_all = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(re.compile(r'^erase all$', re.IGNORECASE)), erase_all_start)],
+        entry_points=[MessageHandler(filters.Regex(_COMMAND_RE['erase all']), erase_all_start)],
         states={
             ERASE_CAPTCHA: [
-                MessageHandler(filters.Regex(re.compile(r'^cancel$', re.IGNORECASE)), cancel),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, verify_captcha)
+                cancel_handler,
+                MessageHandler(text_filter, verify_captcha)
             ],
             ERASE_FINAL_CONFIRM: [
                 CallbackQueryHandler(handle_final_erase_confirmation, pattern="^confirm_erase_"),
@@ -2884,25 +3067,25 @@ def main() -> None:
 
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", start))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^view all$', re.IGNORECASE)), view_all))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^export$', re.IGNORECASE)), export_data))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^expense report$', re.IGNORECASE)), expense_report))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^expense compare$', re.IGNORECASE)), expense_compare))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^view assets$', re.IGNORECASE)), view_assets))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^asset summary$', re.IGNORECASE)), asset_summary))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^view all assets$', re.IGNORECASE)), view_all_assets_detailed))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^budget status$', re.IGNORECASE)), budget_status))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^financial dashboard$', re.IGNORECASE)), financial_dashboard))
-    application.add_handler(MessageHandler(filters.Regex(re.compile(r'^view payments$', re.IGNORECASE)), view_payments))
+    # One-shot keyword commands; patterns come from _COMMAND_RE so the unknown-command filter stays in sync
+    for name, callback in (
+        ('view all', view_all),
+        ('export', export_data),
+        ('expense report', expense_report),
+        ('expense compare', expense_compare),
+        ('view assets', view_assets),
+        ('asset summary', asset_summary),
+        ('view all assets', view_all_assets_detailed),
+        ('budget status', budget_status),
+        ('financial dashboard', financial_dashboard),
+        ('view payments', view_payments),
+    ):
+        application.add_handler(MessageHandler(filters.Regex(_COMMAND_RE[name]), callback))
     application.add_handler(CommandHandler("cancel", cancel))
     
     # Move unknown_command to the very end and make it more specific
     # Only catch messages that don't match any of our known patterns
-    application.add_handler(MessageHandler(
-        filters.TEXT & ~filters.COMMAND & 
-        ~filters.Regex(re.compile(r'^\s*(add|new goal|new debt|view all|delete|progress|export|set reminder|add expense|delete expense|expense report|expense compare|add asset|update asset|delete asset|view assets|view all assets|asset summary|set budget|budget status|financial dashboard|new payment|add payment|view payments|payment progress|delete payment|erase all)\s*$', re.IGNORECASE)), 
-        unknown_command
-    ))
+    application.add_handler(MessageHandler(text_filter & _UnknownCommandFilter(), unknown_command))
 
     logger.info("Snarky Savings Bot is online...")
     application.run_polling()